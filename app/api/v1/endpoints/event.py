@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile, Response, Query
 from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user, get_optional_user
 from app.core.config import Logger
+from app.core.query_budget import query_budget
 from app.schemas.response import ResponseSuccess
 from typing import Dict, Optional, List
 from app.services.event_service import EventService
-from app.schemas.event import EventCreate, EventClassCreate, EventUpdate, ChangeEventStatus
+from app.schemas.event import EventCreate, EventClassCreate, EventUpdate, ChangeEventStatus, EventFilter, EventSearchResponse
 from datetime import datetime
 
 
@@ -14,6 +15,7 @@ logger = Logger(__name__).get_logger()
 
 
 @router.get("/categories", response_model=ResponseSuccess)
+@query_budget(1)
 async def get_all_organizers(
     db = Depends(get_db)
 ):
@@ -30,6 +32,7 @@ async def get_all_organizers(
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.post("", status_code=201)
+@query_budget(7)
 async def create_event(
     name: str = Form(...),
     description: str = Form(...),
@@ -83,6 +86,7 @@ async def create_event(
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.put("/{event_id}", status_code=200)
+@query_budget(8)
 async def update_event(
     event_id: str,
     name: str = Form(...),
@@ -131,14 +135,34 @@ async def update_event(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("", response_model=ResponseSuccess)
+@query_budget(3)
 async def get_all_event(
+    category: Optional[str] = Query(None),
+    location: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    price_min: Optional[float] = Query(None, ge=0),
+    price_max: Optional[float] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db = Depends(get_db)
 ):
     event_service = EventService(db)
     try:
-        response = await event_service.get_all_events()
+        filters = EventFilter(
+            category=category,
+            location=location,
+            date_from=date_from,
+            date_to=date_to,
+            price_min=price_min,
+            price_max=price_max,
+            limit=limit,
+            cursor=cursor,
+        )
+        # Katalog publik dirender sekali per halaman dan disajikan dari cache
+        content = await event_service.get_public_events(filters)
         logger.info("Events retrieved successfully")
-        return response.model_dump()
+        return Response(content=content, media_type="application/json")
     except HTTPException as e:
         logger.error(f"Error getting all events: {str(e.detail)}")
         raise e
@@ -146,7 +170,29 @@ async def get_all_event(
         logger.error(f"Error getting all events: {str(e)}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
     
+@router.get("/search", response_model=EventSearchResponse)
+@query_budget(3)
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db = Depends(get_db)
+):
+    event_service = EventService(db)
+    try:
+        response = await event_service.search_events(q, limit, offset)
+        logger.info(f"Event search for {q} returned {len(response.data)} events")
+        # Dikirim apa adanya agar next_offset tidak dibuang oleh validasi response_model
+        return Response(content=response.model_dump_json(), media_type="application/json")
+    except HTTPException as e:
+        logger.error(f"Error searching events: {str(e.detail)}")
+        raise e
+    except Exception as e:
+        logger.error(f"Error searching events: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    
 @router.get("/{event_id}", response_model=ResponseSuccess)
+@query_budget(3)
 async def get_event_by_id(
     event_id: str,
     optional_user: Optional[Dict] = Depends(get_optional_user),
@@ -154,6 +200,10 @@ async def get_event_by_id(
 ):
     event_service = EventService(db)
     try:
+        if not optional_user:
+            content = await event_service.get_public_event(event_id)
+            logger.info(f"Event {event_id} retrieved successfully")
+            return Response(content=content, media_type="application/json")
         response = await event_service.get_event_by_id(event_id, optional_user)
         logger.info(f"Event {event_id} retrieved successfully")
         return response.model_dump()
@@ -166,6 +216,7 @@ async def get_event_by_id(
     
 
 @router.patch("/{event_id}/change_status", status_code=200)
+@query_budget(5)
 async def change_event_status(
     event_id: str,
     status: ChangeEventStatus,
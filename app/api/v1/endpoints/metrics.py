@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.core.config import settings
+from app.core.exception import UnauthorizedException
+from app.core.metrics import render_metrics
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    # Jika METRICS_TOKEN diset, scraper harus mengirim "Authorization: Bearer <token>"
+    if settings.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise UnauthorizedException("Invalid credentials")
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
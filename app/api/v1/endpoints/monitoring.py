@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends
+from app.dependencies.auth import get_admin_user
+from app.core.config import Logger, settings
+from app.core.cache import event_cache
+from app.core.scheduler import scheduler_stats
+from app.dependencies.database import pool_stats
+from app.core.query_log import slow_query_log
+from app.schemas.response import ResponseSuccess
+from typing import Dict
+
+
+router = APIRouter()
+logger = Logger(__name__).get_logger()
+
+
+@router.get("/cache", response_model=ResponseSuccess)
+async def get_cache_stats(
+    current_user: Dict = Depends(get_admin_user)
+):
+    # Counter dihitung per worker
+    data = {
+        "event": {
+            "backend": event_cache.backend,
+            **event_cache.stats.snapshot(),
+        }
+    }
+    return ResponseSuccess(message="Cache statistics retrieved successfully", data=data).model_dump()
+
+
+@router.get("/scheduler", response_model=ResponseSuccess)
+async def get_scheduler_stats(
+    current_user: Dict = Depends(get_admin_user)
+):
+    # Job hanya berjalan di leader, worker lain mencatatnya sebagai skipped
+    data = scheduler_stats()
+    return ResponseSuccess(message="Scheduler statistics retrieved successfully", data=data).model_dump()
+
+
+@router.get("/database", response_model=ResponseSuccess)
+async def get_database_pool_stats(
+    current_user: Dict = Depends(get_admin_user)
+):
+    # Saturation mendekati 1 berarti request mulai menunggu koneksi (DB_POOL_TIMEOUT)
+    data = {
+        "driver": settings.SQLALCHEMY_DATABASE_URI.split("://", 1)[0],
+        **pool_stats.snapshot(),
+    }
+    return ResponseSuccess(message="Database pool statistics retrieved successfully", data=data).model_dump()
+
+
+@router.get("/slow-queries", response_model=ResponseSuccess)
+async def get_slow_queries(
+    reset: bool = False,
+    current_user: Dict = Depends(get_admin_user)
+):
+    # Diurutkan dari waktu kumulatif terbesar, dihitung per worker
+    data = {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "sample_rate": slow_query_log.sample_rate,
+        "slow_statements": slow_query_log.slow,
+        "top": slow_query_log.top(),
+    }
+    if reset:
+        slow_query_log.reset()
+    return ResponseSuccess(message="Slow queries retrieved successfully", data=data).model_dump()
@@ -0,0 +1,183 @@
+# app/core/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import Logger, settings
+
+logger = Logger(__name__).get_logger()
+
+
+class CacheStats:
+    """
+    Hit/miss counters of a cache, counted per worker.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with a per-entry TTL.
+
+    Every uvicorn worker has its own copy, so an invalidation only reaches the
+    worker that made the change; the other workers see it once the TTL expires.
+    """
+
+    backend = "memory"
+
+    def __init__(self, namespace: str, max_entries: int, ttl: float):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        self.stats.sets += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+        self.stats.invalidations += len(keys)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        await self.delete(*keys)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisCache:
+    """
+    Cache shared by every worker through Redis, with the TTL enforced by Redis.
+
+    Redis failures are logged and treated as misses, so the database stays the
+    fallback when Redis is unavailable.
+    """
+
+    backend = "redis"
+
+    def __init__(self, namespace: str, url: str, ttl: float):
+        import redis.asyncio as redis
+
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._redis = redis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self._redis.get(self._key(key))
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Cache get {key} failed: {str(e)}")
+            value = None
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self._redis.set(self._key(key), value, px=int(self.ttl * 1000))
+            self.stats.sets += 1
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Cache set {key} failed: {str(e)}")
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self._redis.delete(*[self._key(key) for key in keys])
+            self.stats.invalidations += len(keys)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Cache delete {keys} failed: {str(e)}")
+
+    async def delete_prefix(self, prefix: str) -> None:
+        try:
+            keys = [key async for key in self._redis.scan_iter(match=f"{self._key(prefix)}*")]
+            if keys:
+                await self._redis.delete(*keys)
+            self.stats.invalidations += len(keys)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Cache delete prefix {prefix} failed: {str(e)}")
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_cache(namespace: str):
+    """
+    Create the cache configured by CACHE_BACKEND, falling back to memory when Redis is not configured.
+    """
+    if settings.CACHE_BACKEND == "redis" and settings.REDIS_URL:
+        return RedisCache(namespace, settings.REDIS_URL, settings.CACHE_TTL)
+    if settings.CACHE_BACKEND == "redis":
+        logger.warning("CACHE_BACKEND is redis but REDIS_URL is not set, using the in-process cache")
+    return MemoryCache(namespace, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL)
+
+
+# Cache response katalog event publik (list per status dan detail per event)
+event_cache = create_cache("event")
+
+
+def event_list_key(statuses, query: str = "") -> str:
+    return "list:" + ",".join(sorted(status.value for status in statuses)) + "?" + query
+
+
+def event_detail_key(event_id) -> str:
+    return f"detail:{event_id}"
+
+
+async def invalidate_event(event_id=None) -> None:
+    """
+    Drop the cached public event lists and, when given, the detail of one event.
+    """
+    await event_cache.delete_prefix("list:")
+    if event_id is not None:
+        await event_cache.delete(event_detail_key(event_id))
@@ -1,5 +1,9 @@
 from pydantic_settings import BaseSettings
 
+# Driver per DB_CONNECTION untuk engine aplikasi (async) dan untuk seeder/Alembic (blocking)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql", "postgresql": "asyncpg", "mssql": "aioodbc"}
+SYNC_DRIVERS = {"sqlite": "pysqlite", "mysql": "pymysql", "postgresql": "psycopg", "mssql": "pyodbc"}
+
 class Settings(BaseSettings):
     APP_NAME: str = "Fest Ticketing"
     APP_ENV: str = "development"
@@ -14,37 +18,104 @@ class Settings(BaseSettings):
     DB_HOST: str = "localhost"
     DB_PORT: int = 3306
     DB_NAME: str  = "fest_ticketing"
+    DB_ASYNC_DRIVER: str | None = None  # override the async driver, e.g. asyncmy for mysql or psycopg for postgresql
+    DATABASE_URL: str | None = None  # full async URL, overrides the DB_* fields for the application
+    SYNC_DATABASE_URL: str | None = None  # full blocking URL for the seeders
+    MIGRATION_DATABASE_URL: str | None = None  # full blocking URL for Alembic, defaults to the seeder URL
+
+    DB_POOL_SIZE: int = 10  # connections kept open per worker
+    DB_MAX_OVERFLOW: int = 10  # extra connections opened under load per worker
+    DB_POOL_TIMEOUT: float = 30.0  # seconds a request waits for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced (below the server idle timeout)
+    DB_ECHO: bool = False  # print every SQL statement and its parameters
+
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0  # statements slower than this are recorded
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0  # share of the slow statements recorded and logged
+    SLOW_QUERY_TOP_N: int = 50  # statements kept, by cumulative time
     
+    REDIS_URL: str | None = None  # e.g. redis://localhost:6379/0
+
+    CACHE_BACKEND: str = "memory"  # memory: per-worker LRU, redis: shared through REDIS_URL
+    CACHE_TTL: float = 30.0  # seconds a cached response is served
+    CACHE_MAX_ENTRIES: int = 1024  # entries of the in-process LRU
+
+    SCHEDULER_LEADER_BACKEND: str = "auto"  # auto: redis when REDIS_URL is set, else database; redis; database
+    SCHEDULER_LEADER_TTL: float = 30.0  # seconds before a dead leader's redis lease expires
+    SCHEDULER_LEADER_RENEW_INTERVAL: float = 10.0  # seconds between lease renewals and follower retries
+
+    FACE_INDEX_SYNC_INTERVAL: int = 5  # seconds between face index refreshes
+    FACE_INDEX_SYNC_FALLBACK_INTERVAL: int = 60  # seconds between polls while the Redis subscription is up
+    FACE_INDEX_SYNC_OVERLAP: float = 60.0  # seconds re-read before the last sync, for transactions committed late
+    FACE_INDEX_RECONCILE_INTERVAL: int = 300  # seconds between checks dropping deleted users from the index
+    FACE_INDEX_COMPACT_RATIO: float = 0.25  # compact once this share of rows is tombstoned
+    FACE_EMBEDDING_DTYPE: str = "float32"  # float32 or float16 for users.embedding_vector
+    FACE_INDEX_STORE_PATH: str | None = None  # memory-mapped embedding store shared by the workers
+    FACE_INDEX_STORE_REBUILD_RATIO: float = 0.1  # rewrite the store once this share of rows changed since
+    FACE_INDEX_BACKEND: str = "exact"  # exact: brute-force scan, ivf: IVF-flat ANN index
+    FACE_ANN_MIN_SIZE: int = 50000  # embeddings before the ivf backend replaces the exact scan
+    FACE_ANN_NLIST: int = 0  # IVF lists, 0 = sqrt(number of embeddings)
+    FACE_ANN_NPROBE: int = 16  # IVF lists scanned per search, trades recall for latency
+    FACE_ANN_REBUILD_RATIO: float = 0.1  # rebuild once this share of embeddings changed since the build
+    FACE_ANN_INDEX_PATH: str | None = None  # directory shared by the workers for memory-mapped IVF builds
+
+    FACE_ROUTES_MODE: str = "inline"  # inline: served by app.main, separate: served by app.face_main
+    FACE_MODEL_WARMUP: bool = False  # load the face models in the background at startup
+
+    FACE_INFERENCE_WORKERS: int = 1  # inference processes per uvicorn worker, 0 = background thread
+    FACE_INFERENCE_MAX_PENDING: int = 8  # in-flight inference calls before callers have to wait
+    FACE_INFERENCE_TIMEOUT: float = 10.0  # seconds, including the wait for a free slot
+    FACE_BATCH_MAX_SIZE: int = 8  # frames per batched FaceNet pass
+    FACE_BATCH_MAX_WAIT_MS: float = 5.0  # how long the first frame of a batch may wait for more
+    FACE_CROP_TO_FACE: bool = True  # crop frames to the landmark bounding box before FaceNet
+    FACE_TARGET_FPS_MIN: float = 1.0  # bounds of the frame rate hint sent to face clients
+    FACE_TARGET_FPS_MAX: float = 15.0
+
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
     
-    @property
-    def SQLALCHEMY_DATABASE_URI(self) -> str:
+    def database_uri(self, drivers: dict) -> str:
         """
-        Menghasilkan URL koneksi yang sesuai berdasarkan konfigurasi database.
+        Menghasilkan URL koneksi untuk driver yang dipilih berdasarkan konfigurasi database.
         """
+        if self.DB_CONNECTION not in drivers:
+            raise ValueError(f"Unsupported DB_CONNECTION: {self.DB_CONNECTION}")
+        scheme = f"{self.DB_CONNECTION}+{drivers[self.DB_CONNECTION]}"
         if self.DB_CONNECTION == "sqlite":
             # SQLite tidak memerlukan username dan password, cukup dengan file database
-            return f"sqlite:///{self.DB_NAME}.db"  # Biasanya file path untuk SQLite
-        elif self.DB_CONNECTION == "mysql":
-            if self.DB_USER and self.DB_PASSWORD:
-                return f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-            else:
-                return f"mysql+pymysql://{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-        elif self.DB_CONNECTION == "postgresql":
-            if self.DB_USER and self.DB_PASSWORD:
-                return f"postgresql+psycopg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-            else:
-                return f"postgresql+psycopg://{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-        elif self.DB_CONNECTION == "mssql":
-            if self.DB_USER and self.DB_PASSWORD:
-                return f"mssql+pyodbc://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?driver=SQL+Server"
-            else:
-                return f"mssql+pyodbc://{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?driver=SQL+Server"
-        else:
-            raise ValueError(f"Unsupported DB_CONNECTION: {self.DB_CONNECTION}")
-    
+            return f"{scheme}:///{self.DB_NAME}.db"  # Biasanya file path untuk SQLite
+        credentials = f"{self.DB_USER}:{self.DB_PASSWORD}@" if self.DB_USER and self.DB_PASSWORD else ""
+        uri = f"{scheme}://{credentials}{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+        if self.DB_CONNECTION == "mssql":
+            uri += "?driver=SQL+Server"
+        return uri
+
+    @property
+    def SQLALCHEMY_DATABASE_URI(self) -> str:
+        """
+        Async URL used by the application engine.
+        """
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
+        drivers = dict(ASYNC_DRIVERS)
+        if self.DB_ASYNC_DRIVER:
+            drivers[self.DB_CONNECTION] = self.DB_ASYNC_DRIVER
+        return self.database_uri(drivers)
+
+    @property
+    def SYNC_DATABASE_URI(self) -> str:
+        """
+        Blocking URL used by the seeders.
+        """
+        return self.SYNC_DATABASE_URL or self.database_uri(SYNC_DRIVERS)
+
+    @property
+    def MIGRATION_DATABASE_URI(self) -> str:
+        """
+        Blocking URL used by Alembic, so migrations can run with a different (e.g. owner) account.
+        """
+        return self.MIGRATION_DATABASE_URL or self.SYNC_DATABASE_URI
+
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_DAYS: int = 30
@@ -66,6 +137,21 @@ class Settings(BaseSettings):
 
     EMAIL_RESET_TOKEN_EXPIRE_MINUTES: int = 5
     
+    METRICS_TOKEN: str | None = None  # bearer token required by /metrics when set
+
+    QUERY_BUDGET_MODE: str = "off"  # off, warn (log N+1 candidates and budget overruns) or raise (fail, for tests)
+    QUERY_BUDGET_DEFAULT: int = 0  # budget of endpoints without @query_budget, 0 means none
+    N_PLUS_ONE_THRESHOLD: int = 5  # identical statements per request flagged as a possible N+1
+
+    LOG_LEVEL: str = "INFO"  # level of every logger without an entry in LOG_LEVELS
+    LOG_LEVELS: dict[str, str] = {}  # per-module levels, e.g. {"app.services": "DEBUG", "sqlalchemy.engine": "WARNING"}
+    LOG_FORMAT: str = "text"  # console format: text or json (the log file is always json)
+    LOG_FILE: str | None = "app.log"  # empty disables the log file
+
+    LOG_BODY_SAMPLE_RATE: float = 0.0  # share of requests whose body is logged at DEBUG, 0 disables
+    LOG_BODY_MAX_BYTES: int = 2048  # larger bodies are never logged
+    LOG_BODY_CONTENT_TYPES: list[str] = ["application/json", "application/x-www-form-urlencoded"]
+
     AUTH_EXCLUDED_PATHS: list[str] = [
         "/",
         "/docs",
@@ -83,6 +169,7 @@ class Settings(BaseSettings):
         
         "/api/v1/event",
         "/api/v1/event/categories",
+        "/api/v1/event/search",
         ]
     
     class Config:
@@ -93,36 +180,21 @@ settings = Settings()
 import logging
 
 class Logger:
+    """
+    Named logger sharing the process-wide handlers of app.core.log.
+
+    Creating one per request is cheap: the handlers are installed only once and
+    records propagate to the root queue handler.
+    """
+
     def __init__(self, name: str):
         self.logger = self.setup_logging(name)
 
     def setup_logging(self, name: str) -> logging.Logger:
-        # Create a custom logger
-        logger = logging.getLogger(name)
-
-        # Set the default log level
-        logger.setLevel(logging.DEBUG)
-
-        # Create handlers
-        console_handler = logging.StreamHandler()
-        file_handler = logging.FileHandler('app.log')
-
-        # Set level for handlers
-        console_handler.setLevel(logging.DEBUG)
-        file_handler.setLevel(logging.INFO)
-
-        # Create formatters and add them to handlers
-        console_format = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
-        file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s - [%(filename)s:%(lineno)d]')
-
-        console_handler.setFormatter(console_format)
-        file_handler.setFormatter(file_format)
-
-        # Add handlers to the logger
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        from app.core.log import configure_logging
 
-        return logger
+        configure_logging()
+        return logging.getLogger(name)
 
     def get_logger(self) -> logging.Logger:
         return self.logger
@@ -0,0 +1,183 @@
+# app/core/face_ann.py
+import json
+import os
+import shutil
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+# Jumlah sampel training k-means per cluster
+TRAIN_POINTS_PER_LIST = 64
+# Jumlah vektor per chunk saat assignment ke centroid
+ASSIGN_CHUNK_SIZE = 65536
+# Build lama yang disimpan di samping build aktif
+KEEP_BUILDS = 2
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_SIZE):
+        chunk = vectors[start:start + ASSIGN_CHUNK_SIZE]
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file index over L2-normalized embeddings.
+
+    Vectors are clustered around nlist spherical k-means centroids and stored
+    contiguously per cluster, so a search only scans the nprobe clusters closest
+    to the query. The arrays can be saved to a directory and opened memory-mapped,
+    which lets every worker share one read-only copy through the page cache.
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, vectors: np.ndarray,
+                 user_ids: np.ndarray, built_at: float, nprobe: int = 16):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.user_ids = user_ids
+        self.built_at = built_at
+        self.nprobe = nprobe
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, user_ids: Sequence[str], vectors: np.ndarray, built_at: float, nlist: int = 0,
+              nprobe: int = 16, iterations: int = 10, seed: int = 0) -> "IVFFlatIndex":
+        """
+        Train the centroids on a sample of vectors and bucket every vector into its closest list.
+
+        With nlist 0 the number of lists is sqrt(len(vectors)).
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        count = len(vectors)
+        nlist = min(nlist or max(1, int(np.sqrt(count))), count)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(count, nlist * TRAIN_POINTS_PER_LIST)
+        sample = vectors[np.sort(rng.choice(count, sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _assign(sample, centroids)
+            order = np.argsort(assignment, kind="stable")
+            lists, starts = np.unique(assignment[order], return_index=True)
+            # Cluster kosong mempertahankan centroid lamanya
+            centroids[lists] = _unit(np.add.reduceat(sample[order], starts, axis=0))
+
+        assignment = _assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+        return cls(
+            centroids=centroids,
+            offsets=offsets,
+            vectors=vectors[order],
+            user_ids=np.asarray(user_ids, dtype=str)[order],
+            built_at=built_at,
+            nprobe=nprobe,
+        )
+
+    def search(self, query: np.ndarray, k: int = 1, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Return the approximate top-k (user_id, cosine similarity) pairs for a normalized query.
+        """
+        if not len(self) or k <= 0:
+            return []
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        lists = np.argpartition(centroid_scores, self.nlist - nprobe)[self.nlist - nprobe:]
+
+        positions, scores = [], []
+        for list_id in lists:
+            start, end = self.offsets[list_id], self.offsets[list_id + 1]
+            if start == end:
+                continue
+            positions.append(np.arange(start, end))
+            scores.append(self.vectors[start:end] @ query)
+        if not scores:
+            return []
+        positions, scores = np.concatenate(positions), np.concatenate(scores)
+
+        k = min(k, len(scores))
+        top = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(str(self.user_ids[positions[i]]), float(scores[i])) for i in top]
+
+    def save(self, directory: str) -> str:
+        """
+        Write the index to a new build directory and point `CURRENT` at it.
+
+        Builds are never modified in place, so workers that still map an older
+        build keep reading consistent data.
+        """
+        os.makedirs(directory, exist_ok=True)
+        build_id = f"{int(self.built_at * 1000)}-{os.getpid()}"
+        target = os.path.join(directory, build_id)
+        staging = f"{target}.tmp"
+        os.makedirs(staging, exist_ok=True)
+        np.save(os.path.join(staging, "centroids.npy"), self.centroids)
+        np.save(os.path.join(staging, "offsets.npy"), self.offsets)
+        np.save(os.path.join(staging, "vectors.npy"), self.vectors)
+        np.save(os.path.join(staging, "user_ids.npy"), self.user_ids)
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({"built_at": self.built_at, "count": len(self), "nlist": self.nlist}, f)
+        os.replace(staging, target)
+
+        pointer = os.path.join(directory, f"CURRENT.{os.getpid()}")
+        with open(pointer, "w") as f:
+            f.write(build_id)
+        os.replace(pointer, os.path.join(directory, "CURRENT"))
+
+        builds = sorted(name for name in os.listdir(directory) if name[0].isdigit() and not name.endswith(".tmp"))
+        for name in builds[:-KEEP_BUILDS]:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        return target
+
+    @staticmethod
+    def _current_build(directory: str) -> Optional[Tuple[str, dict]]:
+        try:
+            with open(os.path.join(directory, "CURRENT")) as f:
+                target = os.path.join(directory, f.read().strip())
+            with open(os.path.join(target, "meta.json")) as f:
+                return target, json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def saved_at(cls, directory: str) -> Optional[float]:
+        """
+        Build time of the current build in directory, or None when there is none.
+        """
+        current = cls._current_build(directory)
+        return current[1]["built_at"] if current is not None else None
+
+    @classmethod
+    def open(cls, directory: str, nprobe: int = 16) -> Optional["IVFFlatIndex"]:
+        """
+        Memory-map the current build in directory read-only, or return None when there is none.
+        """
+        current = cls._current_build(directory)
+        if current is None:
+            return None
+        target, meta = current
+        return cls(
+            centroids=np.load(os.path.join(target, "centroids.npy")),
+            offsets=np.load(os.path.join(target, "offsets.npy")),
+            vectors=np.load(os.path.join(target, "vectors.npy"), mmap_mode="r"),
+            user_ids=np.load(os.path.join(target, "user_ids.npy"), mmap_mode="r"),
+            built_at=meta["built_at"],
+            nprobe=nprobe,
+        )
+
@@ -0,0 +1,731 @@
+# app/core/face_index.py
+import asyncio
+import json
+import os
+import threading
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from app.core.config import Logger, settings
+from app.core.face_ann import IVFFlatIndex
+from app.core.face_store import SharedEmbeddings, open_store, read_store_header, store_write_lock, write_store
+from app.dependencies.database import AsyncSessionLocal
+from app.utils.embedding_codec import EMBEDDING_DIM
+
+# Kapasitas awal matrix, akan digandakan saat penuh
+INITIAL_CAPACITY = 1024
+
+logger = Logger(__name__).get_logger()
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize vectors along the last axis so cosine similarity becomes a dot product.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores, best first.
+    """
+    total = len(scores)
+    k = min(k, total)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < total:
+        top = np.argpartition(scores, total - k)[total - k:]
+    else:
+        top = np.arange(total)
+    return top[np.argsort(scores[top])[::-1]]
+
+
+class FaceEmbeddingIndex:
+    """
+    Process-resident index of enrolled face embeddings.
+
+    Embeddings are stored as one contiguous, L2-normalized float32 matrix with a
+    parallel array of user ids, so identification is a single matrix-vector product.
+    Rows are appended, replaced in place or tombstoned; tombstoned rows are
+    reclaimed by compact() once they exceed FACE_INDEX_COMPACT_RATIO of the matrix.
+
+    With a shared store attached (FACE_INDEX_STORE_PATH), most embeddings live in
+    a read-only np.memmap shared by every worker. The private matrix then only
+    holds rows changed since the store was written, and the store rows they
+    replace are masked out.
+
+    With FACE_INDEX_BACKEND=ivf and an attached IVFFlatIndex, search() probes the
+    ANN index instead of scanning every row. Users changed since the ANN
+    snapshot are tracked as stale and scored exactly, so results stay current
+    until the next rebuild. Without an ANN index the exact scan is used.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.loaded = False
+        self.store: Optional[SharedEmbeddings] = None
+        self.ann: Optional[IVFFlatIndex] = None
+        self._store_alive = np.zeros(0, dtype=bool)
+        self._store_positions: Dict[str, int] = {}
+        self._ann_stale: Set[str] = set()
+        self._stale_rows: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._trackers: List[Set[str]] = []
+        self._lock = threading.Lock()
+        self._reset(INITIAL_CAPACITY)
+
+    def _reset(self, capacity: int) -> None:
+        self._matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._user_ids = np.empty(capacity, dtype=object)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._positions: Dict[str, int] = {}
+        self._size = 0
+        self._tombstones = 0
+        self._stale_rows = None
+
+    def __len__(self) -> int:
+        return len(self._positions) + len(self._store_positions)
+
+    def __contains__(self, user_id: str) -> bool:
+        user_id = str(user_id)
+        return user_id in self._positions or user_id in self._store_positions
+
+    @property
+    def tombstones(self) -> int:
+        return self._tombstones
+
+    def _mark_changed(self, user_id: str) -> None:
+        if self.ann is not None:
+            self._ann_stale.add(user_id)
+            self._stale_rows = None
+        for changes in self._trackers:
+            changes.add(user_id)
+
+    def _start_tracking(self) -> Set[str]:
+        changes: Set[str] = set()
+        self._trackers.append(changes)
+        return changes
+
+    def _stop_tracking(self, changes: Set[str]) -> None:
+        if changes in self._trackers:
+            self._trackers.remove(changes)
+
+    def track_changes(self) -> Set[str]:
+        """
+        Start recording the users changed from now on, to be passed to attach_store().
+        """
+        with self._lock:
+            return self._start_tracking()
+
+    def untrack_changes(self, changes: Set[str]) -> None:
+        with self._lock:
+            self._stop_tracking(changes)
+
+    def _vector(self, user_id: str, embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            logger.warning(f"Skipping embedding of user {user_id} with dimension {vector.shape[0]}")
+            return None
+        return normalize(vector)
+
+    def _get(self, user_id: str) -> Optional[np.ndarray]:
+        position = self._positions.get(user_id)
+        if position is not None:
+            return self._matrix[position].copy()
+        row = self._store_positions.get(user_id)
+        if row is not None:
+            return np.array(self.store.matrix[row])
+        return None
+
+    def _grow(self, capacity: int) -> None:
+        # Menggandakan kapasitas: biaya copy teramortisasi per append
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        user_ids = np.empty(capacity, dtype=object)
+        user_ids[:self._size] = self._user_ids[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._matrix, self._user_ids, self._alive = matrix, user_ids, alive
+
+    def load(self, rows: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        """
+        Replace the index content with the given (user_id, embedding) rows.
+        """
+        rows = list(rows)
+        with self._lock:
+            self._reset(max(INITIAL_CAPACITY, len(rows)))
+            self._detach_store()
+            self.ann = None
+            self._ann_stale = set()
+            for user_id, embedding in rows:
+                self._upsert(str(user_id), embedding)
+            self.loaded = True
+        logger.info(f"Face index loaded with {len(self)} embeddings")
+
+    def _detach_store(self) -> None:
+        self.store = None
+        self._store_alive = np.zeros(0, dtype=bool)
+        self._store_positions = {}
+
+    def attach_store(self, store: SharedEmbeddings, rows: Iterable[Tuple[str, Optional[Sequence[float]]]],
+                     changes: Optional[Set[str]] = None) -> None:
+        """
+        Use the shared store as the base of the index, with rows changed since it was written on top.
+
+        A None embedding removes the user. Users in changes (tracked while the
+        store or the rows were being read) keep their current embedding.
+        """
+        positions = {user_id.decode(): row for row, user_id in enumerate(store.user_ids)}
+        rows = list(rows)
+        with self._lock:
+            carried = []
+            if changes is not None:
+                carried = [(user_id, self._get(user_id)) for user_id in changes]
+                self._stop_tracking(changes)
+            self._reset(INITIAL_CAPACITY)
+            self.store = store
+            self._store_alive = np.ones(len(store), dtype=bool)
+            self._store_positions = positions
+            for user_id, embedding in rows + carried:
+                if embedding is None:
+                    self._remove(str(user_id))
+                else:
+                    self._upsert(str(user_id), embedding)
+            self.loaded = True
+        logger.info(f"Face index attached to store v{store.version} with {len(store)} embeddings, {len(self._positions)} changed since")
+
+    def _snapshot(self) -> Tuple[Optional[SharedEmbeddings], np.ndarray, np.ndarray, np.ndarray]:
+        # Dipanggil dengan lock: baris store tidak pernah berubah, jadi cukup salin mask-nya
+        live = np.flatnonzero(self._alive[:self._size])
+        return (
+            self.store,
+            self._store_alive.copy(),
+            self._user_ids[live].astype(str),
+            self._matrix[live],
+        )
+
+    def _live_chunks(self, store: Optional[SharedEmbeddings], store_alive: np.ndarray,
+                     vectors: np.ndarray, chunk_size: int = 65536) -> Iterator[np.ndarray]:
+        if store is not None:
+            for start in range(0, len(store), chunk_size):
+                chunk = store.matrix[start:start + chunk_size]
+                yield np.asarray(chunk[store_alive[start:start + chunk_size]])
+        yield vectors
+
+    def _live_user_ids(self, store: Optional[SharedEmbeddings], store_alive: np.ndarray, user_ids: np.ndarray) -> np.ndarray:
+        if store is None:
+            return user_ids
+        return np.concatenate([store.user_ids[store_alive].astype(str), user_ids])
+
+    def export_store(self, path: str, built_at: float) -> Optional[SharedEmbeddings]:
+        """
+        Write every live embedding to the shared store file and re-attach to it.
+
+        Only one process writes at a time: returns None without writing when
+        another one holds the writer lock or has replaced the store since this
+        index attached it; the new file is picked up by refresh_face_store().
+        Runs outside the lock apart from the snapshot, so call it from a thread;
+        changes made while writing are carried over into the private rows.
+        """
+        with store_write_lock(path) as acquired:
+            if not acquired:
+                return None
+            header = read_store_header(path)
+            if header is not None and (self.store is None or header[0] != self.store.version):
+                return None
+            with self._lock:
+                store, store_alive, user_ids, vectors = self._snapshot()
+                changes = self._start_tracking()
+            try:
+                started_at = time.perf_counter()
+                write_store(
+                    path,
+                    self._live_user_ids(store, store_alive, user_ids),
+                    self._live_chunks(store, store_alive, vectors),
+                    self.dim,
+                    built_at,
+                )
+                exported = open_store(path, self.dim)
+                logger.info(f"Face embedding store v{exported.version} written with {len(exported)} embeddings in {time.perf_counter() - started_at:.1f}s")
+            except Exception:
+                with self._lock:
+                    self._stop_tracking(changes)
+                raise
+        self.attach_store(exported, [], changes)
+        return exported
+
+    def store_needs_rebuild(self) -> bool:
+        if self.store is None:
+            return True
+        return len(self._positions) > settings.FACE_INDEX_STORE_REBUILD_RATIO * max(len(self.store), 1)
+
+    def _upsert(self, user_id: str, embedding: Sequence[float]) -> None:
+        vector = self._vector(user_id, embedding)
+        if vector is None:
+            return
+        current = self._get(user_id)
+        if current is not None and np.array_equal(current, vector):
+            # Baris yang dibaca ulang oleh polling tidak menandai ANN sebagai stale
+            return
+        row = self._store_positions.pop(user_id, None)
+        if row is not None:
+            self._store_alive[row] = False
+        position = self._positions.get(user_id)
+        if position is None:
+            if self._size == len(self._matrix):
+                self._grow(len(self._matrix) * 2)
+            position = self._size
+            self._size += 1
+            self._user_ids[position] = user_id
+            self._alive[position] = True
+            self._positions[user_id] = position
+        self._matrix[position] = vector
+        self._mark_changed(user_id)
+
+    def upsert(self, user_id: str, embedding: Sequence[float]) -> None:
+        """
+        Append a new embedding or replace the existing one of the user in place.
+        """
+        with self._lock:
+            self._upsert(str(user_id), embedding)
+
+    def _remove(self, user_id: str) -> bool:
+        position = self._positions.pop(user_id, None)
+        if position is not None:
+            self._alive[position] = False
+            self._user_ids[position] = None
+            self._tombstones += 1
+        else:
+            row = self._store_positions.pop(user_id, None)
+            if row is None:
+                return False
+            self._store_alive[row] = False
+        self._mark_changed(user_id)
+        return True
+
+    def remove(self, user_id: str) -> bool:
+        """
+        Tombstone the embedding of the user. The row is reclaimed on the next compaction.
+        """
+        with self._lock:
+            return self._remove(str(user_id))
+
+    def reconcile(self, user_ids: Set[str], changes: Set[str]) -> int:
+        """
+        Remove the users missing from user_ids, the users enrolled in the database.
+
+        Users changed while user_ids was read (tracked in changes) are kept;
+        returns the number of users removed.
+        """
+        with self._lock:
+            self._stop_tracking(changes)
+            missing = [
+                user_id for user_id in [*self._positions, *self._store_positions]
+                if user_id not in user_ids and user_id not in changes
+            ]
+            for user_id in missing:
+                self._remove(user_id)
+        return len(missing)
+
+    def compact(self) -> None:
+        """
+        Pack live rows to the front of the matrix, dropping tombstoned rows.
+        """
+        with self._lock:
+            if not self._tombstones:
+                return
+            live = np.flatnonzero(self._alive[:self._size])
+            count = len(live)
+            self._matrix[:count] = self._matrix[live]
+            self._user_ids[:count] = self._user_ids[live]
+            self._user_ids[count:self._size] = None
+            self._alive[:count] = True
+            self._alive[count:self._size] = False
+            self._positions = {self._user_ids[i]: i for i in range(count)}
+            self._size = count
+            self._tombstones = 0
+            self._stale_rows = None
+        logger.info(f"Face index compacted to {count} embeddings")
+
+    def maybe_compact(self) -> None:
+        if self._size and self._tombstones / self._size >= settings.FACE_INDEX_COMPACT_RATIO:
+            self.compact()
+
+    def build_ann(self, built_at: float, directory: Optional[str] = None,
+                  saved_at: Optional[float] = None) -> Optional[IVFFlatIndex]:
+        """
+        Build an IVF index from the live rows and attach it.
+
+        Runs outside the lock apart from the snapshot, so call it from a thread;
+        changes made during the build are marked stale. With a directory the
+        build is saved there and attached memory-mapped, and only one process
+        builds at a time: returns None without building when another one holds
+        the build lock or has saved a build other than saved_at (the one seen
+        before deciding to rebuild); refresh_face_ann() attaches that build later.
+        """
+        if not directory:
+            return self._build_ann(built_at)
+        with store_write_lock(directory) as acquired:
+            if not acquired or IVFFlatIndex.saved_at(directory) != saved_at:
+                return None
+            return self._build_ann(built_at, directory)
+
+    def _build_ann(self, built_at: float, directory: Optional[str] = None) -> IVFFlatIndex:
+        with self._lock:
+            store, store_alive, user_ids, vectors = self._snapshot()
+            changes = self._start_tracking()
+
+        try:
+            started_at = time.perf_counter()
+            ann = IVFFlatIndex.build(
+                self._live_user_ids(store, store_alive, user_ids),
+                np.concatenate(list(self._live_chunks(store, store_alive, vectors))),
+                built_at,
+                nlist=settings.FACE_ANN_NLIST,
+                nprobe=settings.FACE_ANN_NPROBE,
+            )
+            if directory:
+                ann.save(directory)
+                ann = IVFFlatIndex.open(directory, nprobe=settings.FACE_ANN_NPROBE)
+            logger.info(f"Face ANN index built with {len(ann)} embeddings in {time.perf_counter() - started_at:.1f}s")
+        except Exception:
+            with self._lock:
+                self._stop_tracking(changes)
+            raise
+
+        with self._lock:
+            self._stop_tracking(changes)
+            self.ann = ann
+            self._ann_stale = changes
+            self._stale_rows = None
+        return ann
+
+    def use_ann(self, ann: IVFFlatIndex, changed_user_ids: Iterable[str]) -> None:
+        """
+        Attach a prebuilt ANN index, marking users changed since it was built as stale.
+        """
+        with self._lock:
+            self.ann = ann
+            self._ann_stale = {str(user_id) for user_id in changed_user_ids}
+            self._stale_rows = None
+        logger.info(f"Face ANN index attached with {len(ann)} embeddings, {len(self._ann_stale)} stale")
+
+    def ann_needs_rebuild(self) -> bool:
+        if self.ann is None:
+            return len(self) >= settings.FACE_ANN_MIN_SIZE
+        return len(self._ann_stale) > settings.FACE_ANN_REBUILD_RATIO * max(len(self.ann), 1)
+
+    def search(self, embedding: Sequence[float], k: int = 1) -> List[Tuple[str, float]]:
+        """
+        Return the top-k (user_id, cosine similarity) pairs, best match first.
+        """
+        query = normalize(np.asarray(embedding, dtype=np.float32).reshape(-1))
+        with self._lock:
+            if len(self) == 0 or k <= 0:
+                return []
+            if self.ann is not None:
+                return self._search_ann(query, k)
+            return self._search_exact(query, k)
+
+    def _stale_positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Posisi baris stale di-cache sampai ada perubahan berikutnya
+        if self._stale_rows is None:
+            stale = self._ann_stale
+            self._stale_rows = (
+                np.array([self._positions[user_id] for user_id in stale if user_id in self._positions], dtype=np.int64),
+                np.array([self._store_positions[user_id] for user_id in stale if user_id in self._store_positions], dtype=np.int64),
+            )
+        return self._stale_rows
+
+    def _search_ann(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        stale = self._ann_stale
+        # Baris stale di ANN sudah usang, skornya dihitung ulang dari matrix
+        matches = [
+            (user_id, score)
+            for user_id, score in self.ann.search(query, k + min(len(stale), k))
+            if user_id not in stale and user_id in self
+        ]
+        positions, rows = self._stale_positions()
+        if len(positions):
+            scores = self._matrix[positions] @ query
+            matches.extend((self._user_ids[position], float(score)) for position, score in zip(positions, scores, strict=True))
+        if len(rows):
+            scores = self.store.matrix[rows] @ query
+            matches.extend((self.store.user_id(row), float(score)) for row, score in zip(rows, scores, strict=True))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:k]
+
+    def _search_exact(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        matches = []
+        if self._store_positions:
+            scores = self.store.matrix @ query
+            if len(self._store_positions) < len(self.store):
+                scores[~self._store_alive] = -np.inf
+            matches.extend(
+                (self.store.user_id(row), float(scores[row]))
+                for row in _top_k(scores, k) if self._store_alive[row]
+            )
+        if self._positions:
+            total = self._size
+            scores = self._matrix[:total] @ query
+            if self._tombstones:
+                scores[~self._alive[:total]] = -np.inf
+            matches.extend(
+                (self._user_ids[i], float(scores[i]))
+                for i in _top_k(scores, k) if self._alive[i]
+            )
+        if self.store is not None:
+            matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:k]
+
+
+# Satu index per proses worker
+face_index = FaceEmbeddingIndex()
+
+
+def changed_since(timestamp: datetime) -> datetime:
+    """
+    Lower bound for reading the rows changed since timestamp.
+
+    Moved back by FACE_INDEX_SYNC_OVERLAP so rows written by a transaction that
+    committed after timestamp but carries an earlier updated_at are not missed.
+    """
+    return timestamp - timedelta(seconds=settings.FACE_INDEX_SYNC_OVERLAP)
+
+
+async def load_face_index() -> None:
+    """
+    Load every enrolled embedding from the database into the process-wide index.
+    """
+    from app.repositories.user_repository import UserRepository
+
+    snapshot_at = datetime.now()
+    face_index_sync.watermark = snapshot_at
+    path = settings.FACE_INDEX_STORE_PATH
+    store = await asyncio.to_thread(open_store, path, face_index.dim) if path else None
+    if store is not None:
+        await attach_face_store(store)
+    else:
+        async with AsyncSessionLocal() as session:
+            rows = await UserRepository(session).get_all_embeddings()
+        face_index.load(rows)
+    if path and face_index.store_needs_rebuild():
+        await asyncio.to_thread(face_index.export_store, path, snapshot_at.timestamp())
+    if settings.FACE_INDEX_BACKEND == "ivf":
+        await refresh_face_ann(snapshot_at)
+
+
+async def attach_face_store(store: SharedEmbeddings) -> None:
+    """
+    Attach the shared store, applying the embeddings changed in the database since it was written.
+    """
+    from app.repositories.user_repository import UserRepository
+
+    changes = face_index.track_changes()
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await UserRepository(session).get_embeddings_updated_since(changed_since(datetime.fromtimestamp(store.built_at)))
+    except Exception:
+        face_index.untrack_changes(changes)
+        raise
+    await asyncio.to_thread(face_index.attach_store, store, rows, changes)
+
+
+async def refresh_face_store(watermark: datetime) -> None:
+    """
+    Re-map the shared store after another worker rewrote it, or rewrite it once
+    too many embeddings changed since it was written.
+    """
+    path = settings.FACE_INDEX_STORE_PATH
+    header = await asyncio.to_thread(read_store_header, path)
+    if header is not None and (face_index.store is None or header[0] != face_index.store.version):
+        store = await asyncio.to_thread(open_store, path, face_index.dim)
+        if store is not None:
+            await attach_face_store(store)
+    elif face_index.store_needs_rebuild():
+        await asyncio.to_thread(face_index.export_store, path, watermark.timestamp())
+
+
+async def refresh_face_ann(snapshot_at: datetime) -> None:
+    """
+    Attach the newest saved IVF build if it is fresh enough, otherwise build (and save) a new one.
+
+    Below FACE_ANN_MIN_SIZE embeddings the exact scan is fast enough and no ANN index is used.
+    """
+    from app.repositories.user_repository import UserRepository
+
+    if len(face_index) < settings.FACE_ANN_MIN_SIZE:
+        return
+    directory = settings.FACE_ANN_INDEX_PATH
+    saved_at = None
+    if directory:
+        ann = await asyncio.to_thread(IVFFlatIndex.open, directory, settings.FACE_ANN_NPROBE)
+        saved_at = ann.built_at if ann is not None else None
+        if ann is not None and (face_index.ann is None or ann.built_at > face_index.ann.built_at):
+            async with AsyncSessionLocal() as session:
+                rows = await UserRepository(session).get_embeddings_updated_since(changed_since(datetime.fromtimestamp(ann.built_at)))
+            if len(rows) <= settings.FACE_ANN_REBUILD_RATIO * len(ann):
+                face_index.use_ann(ann, [user_id for user_id, _ in rows])
+                return
+    # Dengan directory hanya satu worker yang membangun; worker lain memakai hasilnya di polling berikutnya
+    await asyncio.to_thread(face_index.build_ann, snapshot_at.timestamp(), directory, saved_at)
+
+
+class FaceIndexSync:
+    """
+    Keeps the face index of every uvicorn worker in sync.
+
+    Changes are broadcast over Redis pub/sub when REDIS_URL is configured. Every
+    worker also polls the users table for rows updated since its last sync, so a
+    new enrollment is visible everywhere within FACE_INDEX_SYNC_INTERVAL seconds
+    even without Redis. While the Redis subscription is up the poll only catches
+    lost messages and runs every FACE_INDEX_SYNC_FALLBACK_INTERVAL seconds.
+    Deleted users leave no row to poll; they are dropped by the id
+    reconciliation every FACE_INDEX_RECONCILE_INTERVAL seconds.
+    """
+
+    CHANNEL = "face_index:changes"
+
+    def __init__(self, index: FaceEmbeddingIndex):
+        self.index = index
+        self.origin = f"{os.getpid()}-{id(self)}"
+        self.watermark: Optional[datetime] = None
+        self.reconciled_at = time.monotonic()
+        self.polled_at = 0.0
+        self.listening = False
+        self._redis = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _get_redis(self):
+        if self._redis is None and settings.REDIS_URL:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    async def publish(self, user_id: str) -> None:
+        """
+        Notify the other workers that the embedding of the user has changed.
+        """
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            message = json.dumps({"user_id": str(user_id), "origin": self.origin})
+            await client.publish(self.CHANNEL, message)
+        except Exception as e:
+            # Worker lain tetap akan sinkron lewat polling
+            logger.warning(f"Failed to publish face index change for user {user_id}: {str(e)}")
+
+    async def refresh_users(self, user_ids: List[str]) -> None:
+        from app.repositories.user_repository import UserRepository
+
+        async with AsyncSessionLocal() as session:
+            rows = await UserRepository(session).get_embeddings_by_user_ids(user_ids)
+        self._apply(user_ids, rows)
+
+    async def poll(self) -> None:
+        from app.repositories.user_repository import UserRepository
+
+        started_at = datetime.now()
+        since = changed_since(self.watermark) if self.watermark is not None else None
+        async with AsyncSessionLocal() as session:
+            rows = await UserRepository(session).get_embeddings_updated_since(since)
+        self._apply([user_id for user_id, _ in rows], rows)
+        self.watermark = started_at
+        self.polled_at = time.monotonic()
+
+    def poll_interval(self) -> float:
+        # Selama subscription Redis aktif, polling hanya cadangan untuk pesan yang hilang
+        if self.listening:
+            return settings.FACE_INDEX_SYNC_FALLBACK_INTERVAL
+        return settings.FACE_INDEX_SYNC_INTERVAL
+
+    async def reconcile(self) -> None:
+        """
+        Drop the users deleted from the database (or whose face was removed) since the index was loaded.
+        """
+        from app.repositories.user_repository import UserRepository
+
+        changes = self.index.track_changes()
+        try:
+            async with AsyncSessionLocal() as session:
+                user_ids = await UserRepository(session).get_enrolled_user_ids()
+        except Exception:
+            self.index.untrack_changes(changes)
+            raise
+        removed = self.index.reconcile(user_ids, changes)
+        self.reconciled_at = time.monotonic()
+        if removed:
+            logger.info(f"Face index reconciliation removed {removed} deleted users")
+            self.index.maybe_compact()
+
+    def _apply(self, user_ids: List[str], rows: List[Tuple[str, Optional[list]]]) -> None:
+        embeddings = dict(rows)
+        for user_id in user_ids:
+            embedding = embeddings.get(str(user_id))
+            if embedding is None:
+                self.index.remove(user_id)
+            else:
+                self.index.upsert(user_id, embedding)
+        self.index.maybe_compact()
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.FACE_INDEX_SYNC_INTERVAL)
+            try:
+                if not self.index.loaded:
+                    await load_face_index()
+                else:
+                    if time.monotonic() - self.polled_at >= self.poll_interval():
+                        await self.poll()
+                    if time.monotonic() - self.reconciled_at >= settings.FACE_INDEX_RECONCILE_INTERVAL:
+                        await self.reconcile()
+                    if settings.FACE_INDEX_STORE_PATH:
+                        await refresh_face_store(self.watermark)
+                    if settings.FACE_INDEX_BACKEND == "ivf" and self.index.ann_needs_rebuild():
+                        await refresh_face_ann(self.watermark)
+            except Exception as e:
+                logger.error(f"Error polling face index changes: {str(e)}")
+
+    async def _listen_loop(self) -> None:
+        client = self._get_redis()
+        while True:
+            try:
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.CHANNEL)
+                self.listening = True
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") == self.origin:
+                        continue
+                    await self.refresh_users([payload["user_id"]])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.listening = False
+                logger.error(f"Face index subscription failed, retrying: {str(e)}")
+                await asyncio.sleep(settings.FACE_INDEX_SYNC_INTERVAL)
+
+    def start(self) -> None:
+        self._tasks.append(asyncio.create_task(self._poll_loop()))
+        if self._get_redis() is not None:
+            self._tasks.append(asyncio.create_task(self._listen_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.listening = False
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+face_index_sync = FaceIndexSync(face_index)
@@ -0,0 +1,192 @@
+# app/core/face_protocol.py
+import asyncio
+import base64
+import json
+import struct
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from fastapi import WebSocket, WebSocketDisconnect
+from app.core.config import Logger, settings
+from app.core.face_recognition import detect_face_landmarks, release_face_mesh
+from app.core.inference import inference_executor
+from app.core.metrics import WEBSOCKET_SESSIONS
+
+logger = Logger(__name__).get_logger()
+
+# Protokol frame untuk websocket face recognition
+JSON_PROTOCOL = "face.json.v1"
+BINARY_PROTOCOL = "face.binary.v1"
+SUPPORTED_PROTOCOLS = (BINARY_PROTOCOL, JSON_PROTOCOL)
+
+# Header frame binary: sequence number (uint32), width (uint16), height (uint16), big-endian
+FRAME_HEADER = struct.Struct("!IHH")
+
+
+@dataclass
+class Frame:
+    image: bytes
+    sequence: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+async def accept_face_session(websocket: WebSocket) -> str:
+    """
+    Accept the websocket and negotiate the frame protocol.
+
+    Clients opt into binary frames with the `face.binary.v1` subprotocol (or the
+    `?protocol=binary` query parameter for clients that cannot set subprotocols).
+    Everyone else keeps the JSON base64 data-URL protocol.
+    """
+    requested = websocket.scope.get("subprotocols") or []
+    for protocol in SUPPORTED_PROTOCOLS:
+        if protocol in requested:
+            await websocket.accept(subprotocol=protocol)
+            return protocol
+
+    await websocket.accept()
+    if websocket.query_params.get("protocol") == "binary":
+        return BINARY_PROTOCOL
+    return JSON_PROTOCOL
+
+
+def parse_binary_frame(data: bytes) -> Frame:
+    if len(data) <= FRAME_HEADER.size:
+        raise ValueError("Binary frame is too short")
+    sequence, width, height = FRAME_HEADER.unpack_from(data)
+    return Frame(image=data[FRAME_HEADER.size:], sequence=sequence, width=width or None, height=height or None)
+
+
+def parse_json_frame(text: str) -> Frame:
+    frame_data = json.loads(text)
+    image = frame_data["image"]
+    # Data URL: "data:image/jpeg;base64,<payload>"
+    if "," in image:
+        image = image.split(",", 1)[1]
+    return Frame(image=base64.b64decode(image), sequence=frame_data.get("sequence"))
+
+
+async def receive_frame(websocket: WebSocket) -> Frame:
+    """
+    Receive the next frame, accepting both binary and JSON messages.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("bytes") is not None:
+        return parse_binary_frame(message["bytes"])
+    return parse_json_frame(message["text"])
+
+
+class FaceSession:
+    """
+    Latest-frame-wins wrapper around a face recognition websocket.
+
+    A background task keeps reading frames while the handler is busy; only the
+    newest frame is kept and older ones are dropped. Every response carries a
+    `target_fps` hint derived from the measured processing time per frame, so
+    clients slow down instead of building up a backlog.
+
+    The session is pinned to one inference lane, where it owns a FaceMesh
+    instance for its whole lifetime.
+    """
+
+    # Bobot EMA untuk waktu proses per frame
+    SMOOTHING = 0.2
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.id = uuid.uuid4().hex
+        self.lane: Optional[int] = None
+        self.protocol: Optional[str] = None
+        self.received = 0
+        self.dropped = 0
+        self.processing_time: Optional[float] = None
+        self._frame: Optional[Frame] = None
+        self._error: Optional[BaseException] = None
+        self._available = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._frame_started_at: Optional[float] = None
+
+    async def start(self) -> str:
+        self.protocol = await accept_face_session(self.websocket)
+        WEBSOCKET_SESSIONS.labels(self.protocol).inc()
+        self.lane = inference_executor.acquire_lane()
+        self._task = asyncio.create_task(self._pump())
+        return self.protocol
+
+    async def detect_landmarks(self, frame: Frame):
+        """
+        Run landmark detection for the frame with this session's own FaceMesh.
+        """
+        return await inference_executor.run(
+            detect_face_landmarks, frame.image, frame.width, frame.height, self.id, lane=self.lane
+        )
+
+    async def _pump(self) -> None:
+        try:
+            while True:
+                frame = await receive_frame(self.websocket)
+                self.received += 1
+                if self._frame is not None:
+                    self.dropped += 1
+                self._frame = frame
+                self._available.set()
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            self._error = e
+            self._available.set()
+
+    async def next_frame(self) -> Frame:
+        """
+        Wait for and return the newest frame that has not been processed yet.
+        """
+        await self._available.wait()
+        frame = self._frame
+        if frame is None:
+            raise self._error
+        self._frame = None
+        if self._error is None:
+            self._available.clear()
+        self._frame_started_at = time.perf_counter()
+        return frame
+
+    @property
+    def target_fps(self) -> float:
+        if not self.processing_time:
+            return float(settings.FACE_TARGET_FPS_MAX)
+        fps = 1 / self.processing_time
+        return round(min(max(fps, settings.FACE_TARGET_FPS_MIN), settings.FACE_TARGET_FPS_MAX), 1)
+
+    async def send_json(self, payload: Dict[str, Any]) -> None:
+        # Waktu proses dihitung dari frame diambil sampai respons pertama dikirim
+        if self._frame_started_at is not None:
+            elapsed = time.perf_counter() - self._frame_started_at
+            if self.processing_time is None:
+                self.processing_time = elapsed
+            else:
+                self.processing_time += self.SMOOTHING * (elapsed - self.processing_time)
+            self._frame_started_at = None
+        await self.websocket.send_json({**payload, "target_fps": self.target_fps})
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.lane is not None:
+            try:
+                await inference_executor.run(release_face_mesh, self.id, lane=self.lane)
+            except Exception as e:
+                logger.warning(f"Failed to release FaceMesh of session {self.id}: {str(e)}")
+            inference_executor.release_lane(self.lane)
+            self.lane = None
+            WEBSOCKET_SESSIONS.labels(self.protocol).dec()
+        try:
+            await self.websocket.close()
+        except RuntimeError:
+            # Websocket sudah tertutup oleh client
+            pass
@@ -1,43 +1,245 @@
 # app/core/face_recognition.py
+import threading
 import numpy as np
 import cv2
-import mediapipe as mp
-from keras_facenet import FaceNet
-import base64
-import json
 
-embedder = FaceNet()
 
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
+class ModelRegistry:
+    """
+    Lazily creates the face recognition models of the current process.
+
+    TensorFlow and MediaPipe are only imported when a model is first requested,
+    so workers that never serve face routes never pay for them.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory) -> None:
+        self._factories[name] = factory
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._factories[name]()
+                    self._models[name] = model
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm_up(self) -> None:
+        for name in self._factories:
+            self.get(name)
+
+
+def _create_facenet():
+    from keras_facenet import FaceNet
+
+    return FaceNet()
+
+def _create_face_mesh(static_image_mode: bool = False):
+    import mediapipe as mp
+
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=static_image_mode,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+class FaceMeshPool:
+    """
+    FaceMesh instances checked out per websocket session.
+
+    Every session gets its own instance, so MediaPipe tracking only ever sees
+    frames of one user and can skip full re-detection between frames. Released
+    instances are reset and kept for the next session, up to max_idle.
+    """
+
+    def __init__(self, max_idle: int = 4):
+        self.max_idle = max_idle
+        self._sessions = {}
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id: str):
+        with self._lock:
+            face_mesh = self._sessions.get(session_id)
+            if face_mesh is None:
+                face_mesh = self._idle.pop() if self._idle else None
+        if face_mesh is None:
+            face_mesh = _create_face_mesh()
+        with self._lock:
+            self._sessions.setdefault(session_id, face_mesh)
+            return self._sessions[session_id]
+
+    def release(self, session_id: str) -> None:
+        with self._lock:
+            face_mesh = self._sessions.pop(session_id, None)
+            if face_mesh is None:
+                return
+            if len(self._idle) < self.max_idle:
+                # Buang state tracking session sebelumnya
+                if hasattr(face_mesh, "reset"):
+                    face_mesh.reset()
+                self._idle.append(face_mesh)
+                return
+        face_mesh.close()
+
+
+# Model dimiliki oleh proses yang memakainya, lihat app/core/inference.py
+models = ModelRegistry()
+models.register("facenet", _create_facenet)
+# FaceMesh tanpa session tidak boleh memakai tracking antar frame
+models.register("face_mesh", lambda: _create_face_mesh(static_image_mode=True))
+
+face_meshes = FaceMeshPool()
+
+
+def warm_up_models() -> None:
+    """
+    Load every model of the current inference worker ahead of the first request.
+    """
+    models.warm_up()
+
+# Ukuran input FaceNet
+FACE_INPUT_SIZE = 160
+# Margin di sekitar bounding box landmark, relatif terhadap ukuran wajah
+FACE_BOX_MARGIN = 0.2
+# Sisi terpanjang minimum setelah decode dengan IMREAD_REDUCED_*
+DECODE_MAX_SIDE = 640
+
+REDUCED_DECODE_MODES = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
 )
 
+# Buffer input FaceNet yang dipakai ulang antar batch di proses ini
+_face_buffer = np.empty((0, FACE_INPUT_SIZE, FACE_INPUT_SIZE, 3), dtype=np.uint8)
+
+
+def decode_frame(img_bytes: bytes, width: int = None, height: int = None) -> np.ndarray:
+    """
+    Decode an encoded image, letting libjpeg downscale large frames while decoding.
+
+    The reduction factor is picked from the frame size sent by the client, so the
+    decoded image keeps its longest side at or above DECODE_MAX_SIDE.
+    """
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    flags = cv2.IMREAD_COLOR
+    if width and height:
+        for factor, mode in REDUCED_DECODE_MODES:
+            if max(width, height) // factor >= DECODE_MAX_SIDE:
+                flags = mode
+                break
+    frame = cv2.imdecode(nparr, flags)
+    if frame is None:
+        raise ValueError("Invalid image data")
+    return frame
+
 def calculate_embedding(frame):
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    embedding = embedder.embeddings([rgb_frame])
+    embedding = models.get("facenet").embeddings([rgb_frame])
     return embedding[0]
 
+def detect_landmarks(frame, session_id: str = None):
+    """
+    Return the face landmarks of the first face as an (N, 3) float32 array, or None.
+
+    With a session_id the session's own FaceMesh is used so tracking carries over
+    between its frames; without one a static-image FaceMesh is used.
+    """
+    face_mesh = face_meshes.acquire(session_id) if session_id else models.get("face_mesh")
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    results = face_mesh.process(rgb_frame)
+    if not results.multi_face_landmarks:
+        return None
+    landmarks = results.multi_face_landmarks[0].landmark
+    return np.array([(point.x, point.y, point.z) for point in landmarks], dtype=np.float32)
+
+def detect_face_landmarks(img_bytes: bytes, width: int = None, height: int = None, session_id: str = None):
+    """
+    Decode an encoded image and return its face landmarks, or None when no face is found.
+
+    Runs inside an inference worker; the landmarks are a plain array so they can be
+    sent back to the event loop process.
+    """
+    return detect_landmarks(decode_frame(img_bytes, width, height), session_id)
+
+def release_face_mesh(session_id: str) -> None:
+    """
+    Return the FaceMesh of a finished session to the pool of the current worker.
+    """
+    face_meshes.release(session_id)
+
+def face_box(landmarks: np.ndarray, margin: float = FACE_BOX_MARGIN):
+    """
+    Return the normalized (x0, y0, x1, y1) bounding box of the landmarks, widened by margin.
+    """
+    x0, y0 = landmarks[:, 0].min(), landmarks[:, 1].min()
+    x1, y1 = landmarks[:, 0].max(), landmarks[:, 1].max()
+    pad_x, pad_y = (x1 - x0) * margin, (y1 - y0) * margin
+    return (
+        float(max(x0 - pad_x, 0.0)),
+        float(max(y0 - pad_y, 0.0)),
+        float(min(x1 + pad_x, 1.0)),
+        float(min(y1 + pad_y, 1.0)),
+    )
+
+def crop_face(frame: np.ndarray, box, out: np.ndarray) -> None:
+    """
+    Crop the normalized box out of a BGR frame and write it as RGB into out (FaceNet input size).
+    """
+    height, width = frame.shape[:2]
+    if box is not None:
+        x0, y0 = int(box[0] * width), int(box[1] * height)
+        x1, y1 = max(int(box[2] * width), x0 + 1), max(int(box[3] * height), y0 + 1)
+        frame = frame[y0:y1, x0:x1]
+    cv2.resize(frame, (FACE_INPUT_SIZE, FACE_INPUT_SIZE), dst=out, interpolation=cv2.INTER_AREA)
+    cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=out)
+
+def calculate_embeddings(requests: list) -> np.ndarray:
+    """
+    Embed a batch of (img_bytes, box, width, height) requests in one FaceNet pass.
+
+    Each frame is cropped to its face box and resized to the FaceNet input size
+    in a buffer reused across batches. Returns one embedding per request, in order.
+    """
+    global _face_buffer
+    if len(_face_buffer) < len(requests):
+        _face_buffer = np.empty((len(requests), FACE_INPUT_SIZE, FACE_INPUT_SIZE, 3), dtype=np.uint8)
+
+    faces = _face_buffer[:len(requests)]
+    for i, (img_bytes, box, width, height) in enumerate(requests):
+        crop_face(decode_frame(img_bytes, width, height), box, faces[i])
+    return np.asarray(models.get("facenet").embeddings(faces), dtype=np.float32)
+
 def check_blink(landmarks):
-    left_eye = landmarks.landmark[159].y - landmarks.landmark[145].y
-    right_eye = landmarks.landmark[386].y - landmarks.landmark[374].y
+    left_eye = landmarks[159, 1] - landmarks[145, 1]
+    right_eye = landmarks[386, 1] - landmarks[374, 1]
     return left_eye < 0.02 and right_eye < 0.02
 
 def check_turn_left(landmarks):
-    nose_tip = landmarks.landmark[4].x
-    right_face = landmarks.landmark[454].x
+    nose_tip = landmarks[4, 0]
+    right_face = landmarks[454, 0]
     return nose_tip > right_face
 
 def check_turn_right(landmarks):
-    nose_tip = landmarks.landmark[4].x
-    left_face = landmarks.landmark[234].x
+    nose_tip = landmarks[4, 0]
+    left_face = landmarks[234, 0]
     return nose_tip < left_face
 
 def check_look_straight(landmarks):
-    nose_tip = landmarks.landmark[4]
-    left_face = landmarks.landmark[234]
-    right_face = landmarks.landmark[454]
-    face_width = abs(right_face.x - left_face.x)
-    nose_position = (nose_tip.x - left_face.x) / face_width
+    nose_tip = landmarks[4]
+    left_face = landmarks[234]
+    right_face = landmarks[454]
+    face_width = abs(right_face[0] - left_face[0])
+    nose_position = (nose_tip[0] - left_face[0]) / face_width
     return 0.45 < nose_position < 0.55
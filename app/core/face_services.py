@@ -0,0 +1,38 @@
+# app/core/face_services.py
+import asyncio
+from typing import Optional
+from app.core.config import Logger, settings
+from app.core.face_index import load_face_index, face_index_sync
+from app.core.inference import inference_executor, embedding_batcher
+
+logger = Logger(__name__).get_logger()
+
+_warm_up_task: Optional[asyncio.Task] = None
+
+
+async def start_face_services() -> None:
+    """
+    Start everything the face websocket routes need in the current worker.
+    """
+    global _warm_up_task
+    try:
+        await load_face_index()  # Load face embeddings into memory
+    except Exception as e:
+        # Index akan dimuat ulang oleh face_index_sync
+        logger.error(f"Failed to load face index: {str(e)}")
+    face_index_sync.start()  # Keep the face index in sync across workers
+
+    if settings.FACE_MODEL_WARMUP:
+        # Warm-up berjalan di background agar startup tidak tertahan
+        _warm_up_task = asyncio.create_task(inference_executor.warm_up())
+
+
+async def stop_face_services() -> None:
+    global _warm_up_task
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
+        await asyncio.gather(_warm_up_task, return_exceptions=True)
+        _warm_up_task = None
+    await face_index_sync.stop()
+    await embedding_batcher.stop()
+    inference_executor.shutdown()
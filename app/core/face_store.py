@@ -0,0 +1,167 @@
+# app/core/face_store.py
+import os
+import struct
+import time
+import numpy as np
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# magic, format, versi store, jumlah baris, dimensi, lebar user id, waktu build
+HEADER = struct.Struct("<8sIQQIId")
+HEADER_SIZE = 64
+MAGIC = b"FACEEMB1"
+FORMAT_VERSION = 1
+# Matrix dimulai di offset kelipatan ini
+ALIGNMENT = 64
+# Bit rendah versi diisi pid penulis agar dua penulis tidak pernah menghasilkan versi yang sama
+VERSION_PID_BITS = 20
+
+
+class SharedEmbeddings:
+    """
+    Read-only view of an embedding store file.
+
+    The file holds a 64-byte versioned header, the user ids as fixed-width ASCII
+    and the float32 embedding matrix, both mapped with np.memmap. Every worker
+    maps the same file, so the pages are shared through the page cache instead
+    of being copied into each process.
+    """
+
+    def __init__(self, path: str, version: int, built_at: float, user_ids: np.ndarray, matrix: np.ndarray):
+        self.path = path
+        self.version = version
+        self.built_at = built_at
+        self.user_ids = user_ids
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def user_id(self, row: int) -> str:
+        return self.user_ids[row].decode()
+
+
+def _matrix_offset(count: int, id_width: int) -> int:
+    end = HEADER_SIZE + count * id_width
+    return (end + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def read_store_header(path: str) -> Optional[Tuple[int, int, int, int, float]]:
+    """
+    Return (version, count, dim, id_width, built_at) of the store file, or None when it does not exist.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER.size:
+        raise ValueError(f"Embedding store {path} is truncated")
+    magic, file_format, version, count, dim, id_width, built_at = HEADER.unpack(data)
+    if magic != MAGIC or file_format != FORMAT_VERSION:
+        raise ValueError(f"Embedding store {path} has an unsupported format")
+    return version, count, dim, id_width, built_at
+
+
+def open_store(path: str, dim: int) -> Optional[SharedEmbeddings]:
+    """
+    Map the store file read-only, or return None when it does not exist.
+    """
+    header = read_store_header(path)
+    if header is None:
+        return None
+    version, count, file_dim, id_width, built_at = header
+    if file_dim != dim:
+        raise ValueError(f"Embedding store {path} has dimension {file_dim}, expected {dim}")
+    if count == 0:
+        # File kosong tidak bisa di-mmap
+        user_ids = np.empty(0, dtype=f"S{max(id_width, 1)}")
+        matrix = np.empty((0, dim), dtype=np.float32)
+    else:
+        user_ids = np.memmap(path, dtype=f"S{id_width}", mode="r", offset=HEADER_SIZE, shape=(count,))
+        matrix = np.memmap(path, dtype="<f4", mode="r", offset=_matrix_offset(count, id_width), shape=(count, dim))
+    return SharedEmbeddings(path, version, built_at, user_ids, matrix)
+
+
+def new_version() -> int:
+    """
+    Unique store version: the write time in nanoseconds with the writer pid in the low bits.
+    """
+    mask = (1 << VERSION_PID_BITS) - 1
+    return (time.time_ns() & ~mask) | (os.getpid() & mask)
+
+
+@contextmanager
+def store_write_lock(path: str) -> Iterator[bool]:
+    """
+    Try to take the writer lock of the store without waiting.
+
+    Yields False when another process holds it; that process is already
+    rewriting the store and the others only have to re-map it afterwards.
+    The lock is released by the OS if the writer dies.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a+b") as f:
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_store(path: str, user_ids: np.ndarray, chunks: Iterable[np.ndarray], dim: int, built_at: float) -> int:
+    """
+    Write a new store file and atomically swap it in place of the current one.
+
+    The matrix is written from chunks, in the order of user_ids, so it never has
+    to be materialized in one piece. Workers that still map the old file keep
+    reading it until they re-open. Returns the new store version.
+
+    Hold store_write_lock() around it when several processes may write the same path.
+    """
+    user_ids = np.asarray(user_ids, dtype="S")
+    id_width = max(user_ids.dtype.itemsize, 1)
+    user_ids = user_ids.astype(f"S{id_width}")
+    count = len(user_ids)
+    version = new_version()
+
+    staging = f"{path}.{os.getpid()}.tmp"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    written = 0
+    with open(staging, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, count, dim, id_width, built_at).ljust(HEADER_SIZE, b"\0"))
+        f.write(user_ids.tobytes())
+        f.write(b"\0" * (_matrix_offset(count, id_width) - HEADER_SIZE - count * id_width))
+        for chunk in chunks:
+            chunk = np.ascontiguousarray(chunk, dtype="<f4")
+            chunk.tofile(f)
+            written += len(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    if written != count:
+        os.remove(staging)
+        raise ValueError(f"Embedding store got {written} rows for {count} user ids")
+    os.replace(staging, path)
+    return version
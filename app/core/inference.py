@@ -0,0 +1,267 @@
+# app/core/inference.py
+import asyncio
+import multiprocessing
+import time
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from app.core.config import Logger, settings
+from app.core.metrics import (
+    FACE_BATCH_FAILURES, FACE_BATCH_LATENCY, FACE_BATCH_SIZE, FACE_BATCH_WAIT, FACE_INFERENCE_LATENCY, FACE_STAGE_LATENCY,
+)
+
+logger = Logger(__name__).get_logger()
+
+
+class InferenceTimeoutError(Exception):
+    """
+    Raised when an inference call does not finish within FACE_INFERENCE_TIMEOUT.
+    """
+
+
+class InferenceExecutor:
+    """
+    Runs FaceNet and MediaPipe inference outside the event loop.
+
+    With FACE_INFERENCE_WORKERS > 0 calls go to that many single-process lanes,
+    each owning its own FaceNet/FaceMesh instances (see face_recognition.models).
+    A websocket session is pinned to one lane so its FaceMesh tracking state stays
+    in one process; calls without a lane go to the least busy one. With 0 workers
+    a single background thread is used instead. At most FACE_INFERENCE_MAX_PENDING
+    calls are in flight per uvicorn worker; further callers wait for a free slot,
+    and the wait counts toward the call timeout. A lane whose process died is
+    replaced with a fresh one; only the calls running on it fail.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._lanes: List[Executor] = []
+        self._pending: List[int] = []
+        self._sessions: List[int] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        if self._lanes:
+            return
+        if self.workers > 0:
+            logger.info(f"Starting {self.workers} inference worker processes")
+            self._lanes = [self._new_process_lane() for _ in range(self.workers)]
+        else:
+            logger.info("Starting inference thread")
+            self._lanes = [ThreadPoolExecutor(max_workers=1)]
+        self._pending = [0] * len(self._lanes)
+        self._sessions = [0] * len(self._lanes)
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+
+    def _new_process_lane(self) -> Executor:
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def _replace_lane(self, lane: int, broken: Executor) -> None:
+        # Beberapa call yang gagal bersamaan hanya mengganti lane sekali
+        if lane >= len(self._lanes) or self._lanes[lane] is not broken:
+            return
+        logger.error(f"Inference worker process of lane {lane} died, starting a new one")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._lanes[lane] = self._new_process_lane()
+
+    def acquire_lane(self) -> int:
+        """
+        Pin a new session to the lane with the fewest active sessions.
+        """
+        self.start()
+        lane = min(range(len(self._lanes)), key=self._sessions.__getitem__)
+        self._sessions[lane] += 1
+        return lane
+
+    def release_lane(self, lane: int) -> None:
+        if lane < len(self._sessions):
+            self._sessions[lane] = max(self._sessions[lane] - 1, 0)
+
+    async def warm_up(self) -> None:
+        """
+        Load the models in every inference worker so the first frame does not pay for it.
+        """
+        from app.core.face_recognition import warm_up_models
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        try:
+            await asyncio.gather(*[loop.run_in_executor(lane, warm_up_models) for lane in self._lanes])
+            logger.info(f"Face models warmed up in {time.perf_counter() - started_at:.1f}s")
+        except Exception as e:
+            logger.error(f"Error warming up face models: {str(e)}")
+
+    async def run(self, fn: Callable[..., Any], *args: Any, lane: Optional[int] = None, timeout: Optional[float] = None) -> Any:
+        """
+        Run fn(*args) on the given lane, or the least busy one, and await its result.
+        """
+        self.start()
+        if lane is None:
+            lane = min(range(len(self._lanes)), key=self._pending.__getitem__)
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        try:
+            async with asyncio.timeout(timeout):
+                async with self._semaphore:
+                    self._pending[lane] += 1
+                    executor = self._lanes[lane]
+                    try:
+                        return await loop.run_in_executor(executor, fn, *args)
+                    except BrokenProcessPool:
+                        self._replace_lane(lane, executor)
+                        raise
+                    finally:
+                        self._pending[lane] -= 1
+        except TimeoutError:
+            logger.warning(f"Inference call {fn.__name__} timed out after {timeout}s")
+            raise InferenceTimeoutError(f"Inference timed out after {timeout}s")
+        finally:
+            FACE_INFERENCE_LATENCY.labels(fn.__name__).observe(time.perf_counter() - started_at)
+
+    def shutdown(self) -> None:
+        if not self._lanes:
+            return
+        logger.info("Shutting down inference executor...")
+        for executor in self._lanes:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._lanes = []
+        self._pending = []
+        self._sessions = []
+        self._semaphore = None
+
+
+inference_executor = InferenceExecutor(
+    workers=settings.FACE_INFERENCE_WORKERS,
+    max_pending=settings.FACE_INFERENCE_MAX_PENDING,
+    timeout=settings.FACE_INFERENCE_TIMEOUT,
+)
+
+
+class StageTimings:
+    """
+    Per-session timing of the face pipeline stages (decode, landmarks, liveness, embedding).
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            count_total = self.stages.setdefault(stage, [0, 0.0])
+            count_total[0] += 1
+            count_total[1] += elapsed
+            FACE_STAGE_LATENCY.labels(stage).observe(elapsed)
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "stages": {
+                stage: {
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 2),
+                    "avg_ms": round(total / calls * 1000, 2) if calls else 0.0,
+                }
+                for stage, (calls, total) in self.stages.items()
+            },
+            **self.counters,
+        }
+
+
+class EmbeddingBatcher:
+    """
+    Collects frames from all face websocket sessions into batched FaceNet passes.
+
+    A batch is dispatched once FACE_BATCH_MAX_SIZE frames are queued or the oldest
+    frame has waited FACE_BATCH_MAX_WAIT_MS, whichever comes first. Results are
+    fanned back out to the awaiting coroutines. Batch size, queue wait and batch
+    latency are exported at /metrics for tuning the two settings.
+    """
+
+    def __init__(self, executor: InferenceExecutor, max_batch_size: int, max_wait_ms: float):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dispatching: set = set()
+
+    async def embed(self, img_bytes: bytes, box=None, width: int = None, height: int = None):
+        """
+        Return the FaceNet embedding of the face inside box of an encoded image.
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((img_bytes, box, width, height), future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except TimeoutError:
+                    break
+            # Batch dijalankan tanpa menunggu agar batch berikutnya bisa dikumpulkan
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch(self, batch: List[Tuple[tuple, asyncio.Future, float]]) -> None:
+        from app.core.face_recognition import calculate_embeddings
+
+        started_at = time.perf_counter()
+        wait = started_at - min(enqueued_at for _, _, enqueued_at in batch)
+        try:
+            embeddings = await self.executor.run(calculate_embeddings, [request for request, _, _ in batch])
+            if len(embeddings) != len(batch):
+                # Tanpa ini sebagian future tidak pernah selesai
+                raise ValueError(f"Embedding batch of {len(batch)} frames returned {len(embeddings)} results")
+        except Exception as e:
+            FACE_BATCH_FAILURES.inc()
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        FACE_BATCH_SIZE.observe(len(batch))
+        FACE_BATCH_WAIT.observe(wait)
+        FACE_BATCH_LATENCY.observe(time.perf_counter() - started_at)
+        for (_, future, _), embedding in zip(batch, embeddings, strict=True):
+            if not future.done():
+                future.set_result(embedding)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._queue = None
+
+
+embedding_batcher = EmbeddingBatcher(
+    inference_executor,
+    max_batch_size=settings.FACE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.FACE_BATCH_MAX_WAIT_MS,
+)
@@ -0,0 +1,191 @@
+# app/core/leader.py
+import asyncio
+import os
+import socket
+import uuid
+import zlib
+from typing import Optional
+from sqlalchemy import text
+from app.core.config import Logger, settings
+from app.dependencies.database import engine
+
+logger = Logger(__name__).get_logger()
+
+# Perpanjang atau lepas lease hanya jika masih dimiliki token ini
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLease:
+    """
+    Leadership as a Redis key set with NX and a TTL, renewed by its owner.
+
+    When the leader dies the key expires and another worker takes over within ttl seconds.
+    """
+
+    backend = "redis"
+
+    def __init__(self, name: str, url: str, ttl: float):
+        import redis.asyncio as redis
+
+        self.key = f"leader:{name}"
+        self.ttl_ms = int(ttl * 1000)
+        self.token = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._redis = redis.from_url(url)
+
+    async def acquire(self) -> bool:
+        return bool(await self._redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def renew(self) -> bool:
+        return bool(await self._redis.eval(RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    async def release(self) -> None:
+        await self._redis.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class DatabaseLock:
+    """
+    Leadership as a session-level database lock held on a dedicated connection.
+
+    PostgreSQL uses pg_try_advisory_lock and MySQL uses GET_LOCK; the database
+    releases the lock by itself when the leader's connection drops. Other
+    dialects (SQLite) have no such lock, so every worker acts as leader there.
+    """
+
+    backend = "database"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.key = zlib.crc32(name.encode())
+        self._connection = None
+
+    async def acquire(self) -> bool:
+        dialect = engine.dialect.name
+        if dialect not in ("postgresql", "mysql"):
+            logger.warning(f"No cluster lock for {dialect}, every worker runs the scheduled jobs")
+            return True
+        connection = await engine.connect()
+        try:
+            # Autocommit agar koneksi pemegang lock tidak menahan transaksi terbuka
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            if dialect == "postgresql":
+                result = await connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+                acquired = bool(result.scalar())
+            else:
+                result = await connection.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name})
+                acquired = result.scalar() == 1
+        except Exception:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    async def renew(self) -> bool:
+        if self._connection is None:
+            return engine.dialect.name not in ("postgresql", "mysql")
+        try:
+            await self._connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.warning(f"Leader lock connection lost: {str(e)}")
+            await self.close()
+            return False
+
+    async def release(self) -> None:
+        if self._connection is None:
+            return
+        if engine.dialect.name == "postgresql":
+            await self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        else:
+            await self._connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name})
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            try:
+                await connection.close()
+            except Exception:
+                pass
+
+
+class LeaderElection:
+    """
+    Elects one leader among every worker and replica sharing the same Redis or database.
+
+    The leader renews its lease every renew_interval seconds; followers retry
+    acquiring it on the same interval.
+    """
+
+    def __init__(self, name: str, ttl: float, renew_interval: float):
+        self.name = name
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.is_leader = False
+        self._lock = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def backend(self) -> Optional[str]:
+        return self._lock.backend if self._lock is not None else None
+
+    def _create_lock(self):
+        backend = settings.SCHEDULER_LEADER_BACKEND
+        if backend == "redis" or (backend == "auto" and settings.REDIS_URL):
+            return RedisLease(self.name, settings.REDIS_URL, self.ttl)
+        return DatabaseLock(f"fest-ticketing:{self.name}")
+
+    async def _elect(self) -> None:
+        try:
+            if self.is_leader:
+                if not await self._lock.renew():
+                    self.is_leader = False
+                    logger.warning(f"Lost {self.name} leadership")
+            elif await self._lock.acquire():
+                self.is_leader = True
+                logger.info(f"Became {self.name} leader ({self._lock.backend})")
+        except Exception as e:
+            # Lebih aman berhenti menjalankan job daripada berjalan ganda
+            self.is_leader = False
+            logger.error(f"Leader election for {self.name} failed: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self._elect()
+
+    async def start(self) -> None:
+        self._lock = self._create_lock()
+        await self._elect()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._lock is None:
+            return
+        try:
+            if self.is_leader:
+                await self._lock.release()
+        except Exception as e:
+            logger.warning(f"Failed to release {self.name} leadership: {str(e)}")
+        finally:
+            self.is_leader = False
+            await self._lock.close()
@@ -0,0 +1,106 @@
+# app/core/log.py
+import atexit
+import copy
+import datetime
+import json
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.core.config import settings
+
+# Atribut bawaan LogRecord, sisanya dianggap field tambahan (extra=...)
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, with the fields passed through extra= kept as keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.filename}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS:
+                payload[key] = value
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    Queue handler that renders the message in the calling thread and leaves formatting to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Argumen dirender sekarang karena objeknya bisa berubah sebelum listener menulisnya
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging() -> None:
+    """
+    Install the shared handlers on the root logger once per process.
+
+    Records are put on an in-memory queue and written to the console and to
+    LOG_FILE by a QueueListener thread, so the event loop never waits on disk.
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return
+        console_handler = logging.StreamHandler()
+        if settings.LOG_FORMAT == "json":
+            console_handler.setFormatter(JsonFormatter())
+        else:
+            console_handler.setFormatter(logging.Formatter('%(name)s - %(levelname)s - %(message)s'))
+        handlers = [console_handler]
+        if settings.LOG_FILE:
+            file_handler = logging.FileHandler(settings.LOG_FILE)
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        _queue_handler = LocalQueueHandler(log_queue)
+        root.addHandler(_queue_handler)
+        root.setLevel(settings.LOG_LEVEL.upper())
+        for name, level in settings.LOG_LEVELS.items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """
+    Flush the queued records and stop the listener thread.
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue_handler = None
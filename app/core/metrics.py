@@ -0,0 +1,234 @@
+# app/core/metrics.py
+import os
+import time
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from app.core.query_log import slow_query_log
+
+# Mode multiprocess aktif jika PROMETHEUS_MULTIPROC_DIR diset (beberapa worker uvicorn)
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", multiprocess_mode="livesum"
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements issued per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request", "Time spent in SQL statements per HTTP request", ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements issued")
+FACE_INFERENCE_LATENCY = Histogram(
+    "face_inference_seconds", "Face inference call latency by function, including the wait for a free slot", ["function"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+FACE_STAGE_LATENCY = Histogram(
+    "face_stage_seconds", "Face pipeline stage latency", ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+FACE_BATCH_SIZE = Histogram(
+    "face_embedding_batch_size", "Frames per batched FaceNet pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+FACE_BATCH_WAIT = Histogram(
+    "face_embedding_batch_wait_seconds", "Time the oldest frame of a batch waited in the queue",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+FACE_BATCH_LATENCY = Histogram(
+    "face_embedding_batch_seconds", "Run time of a batched FaceNet pass",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+FACE_BATCH_FAILURES = Counter("face_embedding_batch_failures_total", "Batched FaceNet passes that failed")
+WEBSOCKET_SESSIONS = Gauge(
+    "face_websocket_sessions", "Open face recognition websocket sessions", ["protocol"], multiprocess_mode="livesum"
+)
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds", "Scheduled job run time", ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60),
+)
+SCHEDULER_JOB_LAG = Histogram(
+    "scheduler_job_lag_seconds", "Delay between the scheduled and the actual start of a job", ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+
+
+class RequestQueries:
+    """
+    SQL statements issued while serving one request.
+
+    The SQL text of every statement is only kept when track_statements is set
+    (QUERY_BUDGET_MODE, see app.core.query_budget).
+    """
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, track_statements: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[StatementCounter] = StatementCounter() if track_statements else None
+
+
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+
+def install_query_timing(engine) -> None:
+    """
+    Time every statement of the engine (the sync engine behind an AsyncEngine) once.
+
+    The duration feeds db_queries_total, the current request's RequestQueries
+    (per-request histograms and query budgets) and the slow-query log.
+    SQLAlchemy runs the statements of an AsyncSession in a greenlet sharing the
+    caller's context, so the request's RequestQueries is visible here.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        DB_QUERIES.inc()
+        queries = current_queries.get()
+        if queries is not None:
+            queries.count += 1
+            queries.seconds += elapsed
+            if queries.statements is not None:
+                queries.statements[statement] += 1
+        slow_query_log.observe(statement, elapsed * 1000, cursor)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # Statement yang gagal tidak memanggil after_cursor_execute
+        started = context.connection.info.get("query_started_at") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and SQL usage per route template.
+
+    The route template (e.g. /api/v1/event/{event_id}) is read after routing, so
+    the label cardinality stays bounded; unknown paths share one label.
+    """
+
+    def __init__(self, app):
+        from app.core.query_budget import tracking_enabled
+
+        self.app = app
+        self.track_statements = tracking_enabled()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = RequestQueries(self.track_statements)
+        token = current_queries.set(queries)
+        HTTP_IN_FLIGHT.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started_at
+            HTTP_IN_FLIGHT.dec()
+            current_queries.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(duration)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(queries.count)
+            DB_TIME_PER_REQUEST.labels(route).observe(queries.seconds)
+        if self.track_statements:
+            # Hanya dicek jika request selesai tanpa error
+            from app.core.query_budget import check_request
+
+            check_request(scope, queries)
+
+
+class StateCollector:
+    """
+    Exposes per-worker state kept elsewhere (DB pool, response cache) at scrape time.
+    """
+
+    def describe(self):
+        # Tanpa describe(), register() memanggil collect() saat import dan
+        # mengimpor app.dependencies.database yang belum selesai dimuat
+        return []
+
+    def collect(self):
+        from app.core.cache import event_cache
+        from app.dependencies.database import pool_stats
+
+        worker = str(os.getpid())
+        pool = pool_stats.snapshot()
+        for name, key, documentation in (
+            ("db_pool_size", "size", "Connections kept open by the pool"),
+            ("db_pool_checked_out", "checked_out", "Connections in use"),
+            ("db_pool_checked_in", "checked_in", "Idle connections in the pool"),
+            ("db_pool_overflow", "overflow", "Connections opened above the pool size"),
+            ("db_pool_peak_checked_out", "peak_checked_out", "Highest number of connections in use"),
+        ):
+            if pool[key] is not None:
+                gauge = GaugeMetricFamily(name, documentation, labels=["worker"])
+                gauge.add_metric([worker], pool[key])
+                yield gauge
+        checkouts = CounterMetricFamily("db_pool_checkouts", "Connections checked out of the pool", labels=["worker"])
+        checkouts.add_metric([worker], pool["checkouts"])
+        yield checkouts
+
+        stats = event_cache.stats.snapshot()
+        for name, key, documentation in (
+            ("cache_hits", "hits", "Cache lookups served from the cache"),
+            ("cache_misses", "misses", "Cache lookups that went to the database"),
+            ("cache_errors", "errors", "Cache backend failures"),
+        ):
+            counter = CounterMetricFamily(name, documentation, labels=["cache", "worker"])
+            counter.add_metric(["event", worker], stats[key])
+            yield counter
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Share of cache lookups that were hits", labels=["cache", "worker"])
+        ratio.add_metric(["event", worker], stats["hit_ratio"])
+        yield ratio
+
+
+state_collector = StateCollector()
+REGISTRY.register(state_collector)
+
+
+def render_metrics() -> bytes:
+    """
+    Render the metrics in the Prometheus text format.
+
+    In multiprocess mode the metric files of every worker are merged; the
+    pool and cache state is only that of the worker answering the scrape.
+    """
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(state_collector)
+    return generate_latest(registry)
@@ -1,26 +1,90 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, Response
-from app.core.config import Logger
+import logging
+import random
+import time
+from app.core.config import Logger, settings
 
 # Usage
 logger = Logger(__name__).get_logger()
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host  # Get the client's IP address
-        logger.info(f"Request from IP: {client_ip} - {request.method} {request.url}")
-        logger.debug(f"Request headers: {request.headers}")  # Log request headers
-        
-        # Log the request body only if needed (be cautious with sensitive information)
-        try:
-            body = await request.body()
-            logger.debug(f"Request body: {body.decode()}")  # Decode for better readability
-        except Exception as e:
-            logger.warning(f"Failed to log request body: {e}")
 
-        response: Response = await call_next(request)
+class LoggingMiddleware:
+    """
+    Pure ASGI access log: one record per HTTP request with status, size and duration.
+
+    Request bodies are never buffered. When DEBUG is enabled, a sample of small
+    bodies with a textual content type (LOG_BODY_*) is copied while the endpoint
+    reads it and logged with the access record; uploads are never logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.body_content_types = tuple(settings.LOG_BODY_CONTENT_TYPES)
+        self.body_max_bytes = settings.LOG_BODY_MAX_BYTES
+        self.body_sample_rate = settings.LOG_BODY_SAMPLE_RATE
+
+    def _should_capture_body(self, scope) -> bool:
+        if self.body_sample_rate <= 0 or not logger.isEnabledFor(logging.DEBUG):
+            return False
+        content_type = ""
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                content_type = value.decode("latin-1").lower()
+            elif name == b"content-length":
+                content_length = int(value) if value.isdigit() else None
+        if not content_type.startswith(self.body_content_types):
+            return False
+        # Body tanpa content-length (chunked) atau yang terlalu besar dilewati
+        if content_length is None or content_length > self.body_max_bytes:
+            return False
+        return random.random() < self.body_sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        logger.info(f"Response status: {response.status_code}")
-        logger.debug(f"Response headers: {response.headers}")  # Log response headers
+        started_at = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+        body = bytearray() if self._should_capture_body(scope) else None
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper if body is not None else receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            client = scope.get("client")
+            client_ip = client[0] if client else "-"
+            route = scope.get("route")
+            record = {
+                "client_ip": client_ip,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status_code,
+                "duration_ms": round(duration_ms, 2),
+                "response_bytes": response_bytes,
+            }
+            # Format lazy: string hanya dibangun jika record benar-benar ditulis
+            logger.info(
+                "%s %s %s %d %.2fms %dB",
+                client_ip, scope["method"], scope["path"], status_code, duration_ms, response_bytes,
+                extra={"http": record},
+            )
+            if body:
+                logger.debug("Request body %s %s: %s", scope["method"], scope["path"], bytes(body).decode("utf-8", "replace"))
 
-        return response
\ No newline at end of file
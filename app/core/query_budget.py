@@ -0,0 +1,91 @@
+# app/core/query_budget.py
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional
+from app.core.config import Logger, settings
+from app.core.metrics import RequestQueries, current_queries
+
+logger = Logger(__name__).get_logger()
+
+# off: tidak dicek, warn: hanya log, raise: gagal dengan QueryBudgetExceeded (untuk test)
+QUERY_BUDGET_MODES = ("off", "warn", "raise")
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a request or a tracked block issues more SQL statements than its budget.
+    """
+
+    def __init__(self, message: str, queries: RequestQueries):
+        super().__init__(message)
+        self.queries = queries
+
+
+def tracking_enabled() -> bool:
+    return settings.QUERY_BUDGET_MODE in ("warn", "raise")
+
+
+def query_budget(limit: int) -> Callable:
+    """
+    Declare the maximum number of SQL statements an endpoint may issue per request.
+
+        @router.get("/{event_id}")
+        @query_budget(6)
+        async def get_event(...): ...
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+def repeated_statements(queries: RequestQueries) -> List[tuple]:
+    """
+    Statements issued at least N_PLUS_ONE_THRESHOLD times with the same SQL text, the usual N+1 shape.
+    """
+    return sorted(
+        ((statement, count) for statement, count in queries.statements.items() if count >= settings.N_PLUS_ONE_THRESHOLD),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def check_queries(name: str, queries: RequestQueries, budget: Optional[int], strict: bool) -> None:
+    """
+    Log N+1 candidates and enforce the budget, raising QueryBudgetExceeded when strict.
+    """
+    for statement, count in repeated_statements(queries):
+        logger.warning("Possible N+1 in %s: %d x %s", name, count, statement)
+    if budget is None or queries.count <= budget:
+        return
+    message = f"{name} issued {queries.count} SQL statements, budget is {budget}"
+    if strict:
+        raise QueryBudgetExceeded(message, queries)
+    logger.warning(message)
+
+
+def check_request(scope, queries: RequestQueries) -> None:
+    """
+    Check a finished HTTP request against the budget declared on its endpoint.
+    """
+    route = scope.get("route")
+    if route is None:
+        return
+    budget = getattr(getattr(route, "endpoint", None), "query_budget", None) or settings.QUERY_BUDGET_DEFAULT or None
+    check_queries(f"{scope['method']} {route.path}", queries, budget, settings.QUERY_BUDGET_MODE == "raise")
+
+
+@asynccontextmanager
+async def track_queries(budget: Optional[int] = None, name: str = "block") -> AsyncIterator[RequestQueries]:
+    """
+    Count the SQL statements of a block, e.g. a service call in a test, and fail when it exceeds budget.
+
+        async with track_queries(budget=4, name="create_event"):
+            await event_service.create_event(event, current)
+    """
+    queries = RequestQueries(track_statements=True)
+    token = current_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        current_queries.reset(token)
+    check_queries(name, queries, budget, strict=True)
@@ -0,0 +1,136 @@
+# app/core/query_log.py
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from app.core.config import Logger, settings
+
+logger = Logger(__name__).get_logger()
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frame dari modul ini, dari hook waktu statement dan dari pembuat session tidak dihitung sebagai call site
+IGNORED_FILES = (
+    os.path.abspath(__file__),
+    os.path.join(APP_DIR, "core", "metrics.py"),
+    os.path.join(APP_DIR, "dependencies", "database.py"),
+)
+MAX_CALL_SITES = 5
+
+
+def _frames(frame):
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def call_site() -> Optional[str]:
+    """
+    Return "path:line in function" of the innermost application frame issuing the statement.
+
+    With the async engine the statement runs in a greenlet whose stack ends at
+    SQLAlchemy, so the suspended parent greenlet (the awaiting coroutines) is searched too.
+    """
+    stacks = [sys._getframe(1)]
+    try:
+        import greenlet
+
+        parent = greenlet.getcurrent().parent
+        if parent is not None and parent.gr_frame is not None:
+            stacks.append(parent.gr_frame)
+    except ImportError:
+        pass
+    for stack in stacks:
+        for frame in _frames(stack):
+            filename = frame.f_code.co_filename
+            if filename.startswith(APP_DIR) and filename not in IGNORED_FILES:
+                return f"{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}"
+    return None
+
+
+class SlowStatement:
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.last_rows = None
+        self.last_seen = 0.0
+        self.call_sites: List[str] = []
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "statement": self.statement,
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2),
+            "last_rows": self.last_rows,
+            "last_seen": self.last_seen,
+            "call_sites": self.call_sites,
+        }
+
+
+class SlowQueryLog:
+    """
+    Statements slower than the threshold, grouped by SQL text and kept to the top N by cumulative time.
+
+    Every statement is timed by the hook of app.core.metrics; only a sample
+    (sample_rate) of the slow ones is recorded and logged, and the call site is
+    resolved only for those.
+    Counted per worker.
+    """
+
+    def __init__(self, threshold_ms: float, sample_rate: float, top_n: int):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.slow = 0
+        self._statements: Dict[str, SlowStatement] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration_ms: float, rows: Optional[int]) -> None:
+        self.slow += 1
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        site = call_site()
+        logger.warning("Slow query %.2fms rows=%s at %s: %s", duration_ms, rows, site, statement)
+        with self._lock:
+            entry = self._statements.get(statement)
+            if entry is None:
+                entry = self._statements[statement] = SlowStatement(statement)
+            entry.calls += 1
+            entry.total_ms += duration_ms
+            entry.last_ms = duration_ms
+            entry.max_ms = max(entry.max_ms, duration_ms)
+            entry.last_rows = rows
+            entry.last_seen = time.time()
+            if site and site not in entry.call_sites and len(entry.call_sites) < MAX_CALL_SITES:
+                entry.call_sites.append(site)
+            if len(self._statements) > self.top_n:
+                # Buang statement dengan waktu kumulatif terkecil
+                smallest = min(self._statements.values(), key=lambda item: item.total_ms)
+                del self._statements[smallest.statement]
+
+    def top(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = sorted(self._statements.values(), key=lambda item: item.total_ms, reverse=True)
+            return [entry.snapshot() for entry in entries]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self.slow = 0
+
+    def observe(self, statement: str, duration_ms: float, cursor) -> None:
+        """
+        Record the statement when it ran longer than the threshold; fed by the query timing hook.
+        """
+        if duration_ms >= self.threshold_ms:
+            rows = getattr(cursor, "rowcount", None)
+            self.record(statement, duration_ms, rows if rows is not None and rows >= 0 else None)
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_SAMPLE_RATE, settings.SLOW_QUERY_TOP_N)
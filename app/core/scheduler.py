@@ -1,48 +1,158 @@
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from app.core.config import Logger
+from app.core.config import Logger, settings
+from app.core.leader import LeaderElection
+from app.core.metrics import SCHEDULER_JOB_DURATION, SCHEDULER_JOB_LAG
 import datetime
+import functools
+import time
+from typing import Any, Dict
 from app.dependencies.database import get_db
-from app.models import Event, EventStatus
-from sqlalchemy.future import select
+from app.repositories.event_repository import EventRepository
+from app.core.cache import invalidate_event
 
 # Initialize the scheduler
 scheduler = AsyncIOScheduler()
 
+# Hanya leader di seluruh worker dan replika yang menjalankan job
+leader = LeaderElection("scheduler", settings.SCHEDULER_LEADER_TTL, settings.SCHEDULER_LEADER_RENEW_INTERVAL)
+
 # Initialize the logger
 logger = Logger(__name__).get_logger()
 
+
+class JobStats:
+    """
+    Run counters, duration and lag (start time minus scheduled time) of a job, counted per worker.
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_started_at = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_duration_ms": round(self.last_duration * 1000, 2),
+            "avg_duration_ms": round(self.total_duration / self.runs * 1000, 2) if self.runs else 0.0,
+            "max_duration_ms": round(self.max_duration * 1000, 2),
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+        }
+
+
+job_stats: Dict[str, JobStats] = {}
+
+
+def leader_only(job_id: str):
+    """
+    Run the job only on the elected leader and record its duration.
+    """
+    def decorator(func):
+        stats = job_stats.setdefault(job_id, JobStats())
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not leader.is_leader:
+                stats.skipped += 1
+                return
+            stats.runs += 1
+            stats.last_started_at = datetime.datetime.now(datetime.timezone.utc)
+            started_at = time.perf_counter()
+            try:
+                await func(*args, **kwargs)
+            except Exception:
+                stats.failures += 1
+                raise
+            finally:
+                stats.last_duration = time.perf_counter() - started_at
+                stats.total_duration += stats.last_duration
+                stats.max_duration = max(stats.max_duration, stats.last_duration)
+                SCHEDULER_JOB_DURATION.labels(job_id).observe(stats.last_duration)
+        return wrapper
+    return decorator
+
+
+def record_job_lag(event):
+    # Lag dihitung dari waktu terjadwal sampai job benar-benar mulai
+    stats = job_stats.get(event.job_id)
+    if stats is None or stats.last_started_at is None:
+        return
+    lag = (stats.last_started_at - event.scheduled_run_time).total_seconds()
+    if lag < 0:
+        return
+    stats.last_lag = lag
+    stats.max_lag = max(stats.max_lag, lag)
+    SCHEDULER_JOB_LAG.labels(event.job_id).observe(lag)
+    if lag > 1:
+        logger.warning(f"Job {event.job_id} started {lag:.2f}s after its scheduled time")
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    return {
+        "is_leader": leader.is_leader,
+        "leader_backend": leader.backend,
+        "jobs": {job_id: stats.snapshot() for job_id, stats in job_stats.items()},
+    }
+
+# Event PENDING yang tidak berubah selama ini akan dibatalkan
+PENDING_EVENT_TIMEOUT = datetime.timedelta(minutes=30)
+# Jumlah event yang dibatalkan per transaksi
+CANCEL_BATCH_SIZE = 500
+
 # Contoh task yang akan dijalankan setiap waktu tertentu
+@leader_only("cancel_pending_events")
 async def my_cron_job():
     logger.info(f"Running cron job at {datetime.datetime.now()}")
+    cutoff = datetime.datetime.now() - PENDING_EVENT_TIMEOUT
+    error = None
     async for session in get_db():  # Use async for to get the session
         try:
-            logger.info("Attempting to retrieve all events with status 'PENDING'")
-            # Menggunakan ORM untuk mengambil event dengan status 'PENDING'
-            query = select(Event).where(Event.status == EventStatus.PENDING).order_by(Event.updated_at.desc())
-            result = await session.execute(query)
-            events = result.scalars().all()
-            
-            # update status event yang sudah lewat waktu
-            for event in events:
-                if event.updated_at < datetime.datetime.now() - datetime.timedelta(minutes=30):
-                    event.status = EventStatus.CANCELLED
-                    await session.commit()
-                    logger.info(f"Event {event.event_id} has been cancelled")
-                else:
-                    logger.info(f"Event {event.event_id} is still pending")
-                    
+            event_repository = EventRepository(session)
+            cancelled = 0
+            # Batalkan event PENDING yang sudah lewat waktu per batch, satu commit per batch
+            while True:
+                event_ids = await event_repository.cancel_pending_events_before(cutoff, CANCEL_BATCH_SIZE)
+                await session.commit()
+                cancelled += len(event_ids)
+                for event_id in event_ids:
+                    logger.info(f"Event {event_id} has been cancelled")
+                if len(event_ids) < CANCEL_BATCH_SIZE:
+                    break
+            if cancelled:
+                # Event yang dibatalkan muncul di katalog publik
+                await invalidate_event()
+            logger.info(f"Cancelled {cancelled} stale pending events")
         except Exception as e:
-            logger.error(f"Error retrieving events: {str(e)}")
+            await session.rollback()
+            logger.error(f"Error cancelling pending events: {str(e)}")
+            error = e
+    if error is not None:
+        # Dilempar setelah session ditutup agar tercatat sebagai kegagalan job
+        raise error
 
 # Fungsi untuk mengatur dan memulai scheduler
-def start_scheduler():
-    # Cron trigger: Menjalankan setiap 10 detik
+async def start_scheduler():
+    # Cron trigger: Menjalankan setiap menit
     logger.info("Starting scheduler...")
-    scheduler.add_job(my_cron_job, CronTrigger(minute="*/1"))
+    await leader.start()
+    scheduler.add_job(my_cron_job, CronTrigger(minute="*/1"), id="cancel_pending_events")
+    scheduler.add_listener(record_job_lag, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
     scheduler.start()
 
 # Fungsi untuk menghentikan scheduler saat aplikasi shutdown
-def shutdown_scheduler():
+async def shutdown_scheduler():
     logger.info("Shutting down scheduler...")
-    scheduler.shutdown()
\ No newline at end of file
+    scheduler.shutdown()
+    await leader.stop()
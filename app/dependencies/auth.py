@@ -1,9 +1,10 @@
-from app.core.exception import (UnauthorizedException, ServerErrorException)
+from app.core.exception import (UnauthorizedException, ForbiddenException, ServerErrorException)
 from fastapi.requests import Request
 from app.core.security import verify_jwt_token
 from typing import Dict
 from fastapi import Depends
 from app.repositories import PersonalAccessTokenRepository
+from app.models import Role
 
 async def get_access_token(request: Request) -> str:
     try:
@@ -47,3 +48,9 @@ async def get_optional_user(request: Request) -> Dict:
     except Exception as e:
         raise ServerErrorException("An error occurred while getting the user") from e
     
+
+
+async def get_admin_user(current_user: Dict = Depends(get_current_user)) -> Dict:
+    if current_user.get("role") != str(Role.ADMIN):
+        raise ForbiddenException("Forbidden")
+    return current_user
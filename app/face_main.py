@@ -0,0 +1,35 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from app.api.v1.endpoints import face, metrics
+from app.core.config import Logger, settings
+from app.core.face_services import start_face_services, stop_face_services
+from app.core.metrics import MetricsMiddleware
+
+logger = Logger(__name__).get_logger()
+
+
+# Aplikasi terpisah khusus face recognition (FACE_ROUTES_MODE=separate):
+#   uvicorn app.face_main:app --port 8001 --workers 2
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    logger.info("Starting Face Recognition service...")
+    await start_face_services()
+    yield
+    logger.info("Shutting down Face Recognition service...")
+    await stop_face_services()
+
+app = FastAPI(lifespan=lifespan, title=f"{settings.APP_NAME} Face Recognition")
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(face.router, prefix="/ws", tags=["Face Recognition"])
+app.include_router(metrics.router)
@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from app.schemas.response import ResponseError, ResponseModel
-from app.api.v1.endpoints import auth, event_organizer, event, face, user, payment
+from app.api.v1.endpoints import auth, event_organizer, event, face, user, payment, monitoring, metrics
 from fastapi.exceptions import RequestValidationError, HTTPException
 from app.utils.get_error_details import get_error_details
 from app.core.config import settings
@@ -9,14 +9,22 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.middleware import LoggingMiddleware, AuthenticationMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.core.scheduler import start_scheduler, shutdown_scheduler
+from app.core.face_services import start_face_services, stop_face_services
+from app.core.cache import event_cache
+from app.core.metrics import MetricsMiddleware
 async def lifespan(app: FastAPI):
     # Startup event
     print("Starting FastAPI...")
-    start_scheduler()  # Start the scheduler
+    await start_scheduler()  # Start the scheduler
+    if settings.FACE_ROUTES_MODE == "inline":
+        await start_face_services()  # Face index, inference workers and model warm-up
     yield  # Yield control to FastAPI to handle the main app
     # Shutdown event
     print("Shutting down FastAPI...")
-    shutdown_scheduler()  # Stop the scheduler
+    await shutdown_scheduler()  # Stop the scheduler
+    if settings.FACE_ROUTES_MODE == "inline":
+        await stop_face_services()
+    await event_cache.close()
     
 app = FastAPI(
     lifespan=lifespan,
@@ -57,6 +65,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
 # app.add_middleware(AuthenticationMiddleware)
 
 # handle 422 error
@@ -117,8 +126,11 @@ app.include_router(event_organizer.router, prefix=settings.API_V1 + "organizer",
 app.include_router(event.router, prefix=settings.API_V1 + "event", tags=["Event"])
 app.include_router(user.router, prefix=settings.API_V1 + "user", tags=["User"])
 app.include_router(payment.router, prefix=settings.API_V1 + "payment", tags=["Payment"])
-# Include user and auth routes
-app.include_router(face.router, prefix="/ws", tags=["Face Recognition"])
+app.include_router(monitoring.router, prefix=settings.API_V1 + "monitoring", tags=["Monitoring"])
+app.include_router(metrics.router)
+# Face routes run here unless they are served by app.face_main (FACE_ROUTES_MODE=separate)
+if settings.FACE_ROUTES_MODE == "inline":
+    app.include_router(face.router, prefix="/ws", tags=["Face Recognition"])
 
 
 @app.get("/", response_model=ResponseModel)
@@ -1,4 +1,5 @@
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index, text
 from datetime import datetime
 from uuid import UUID, uuid4
 from enum import Enum
@@ -17,6 +18,18 @@ class EventStatus(str, Enum):
 # Event Model
 class Event(SQLModel, table=True):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_status_updated_at", "status", "updated_at"),
+        Index("ix_events_status_date_event_id", "status", "date", "event_id"),
+        Index("ix_events_organizer_id_updated_at", "organizer_id", "updated_at"),
+        # Partial index untuk scheduler yang membatalkan event PENDING
+        Index(
+            "ix_events_pending_updated_at",
+            "updated_at",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+    )
 
     event_id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from uuid import UUID
 from datetime import datetime
 from typing import Dict, Any
@@ -6,6 +7,9 @@ from typing import Dict, Any
 
 class EventCategoryAssociation(SQLModel, table=True):
     __tablename__ = 'event_category_association'
+    __table_args__ = (
+        Index("ix_event_category_association_category_name", "category_name", "event_id"),
+    )
 
     event_id: UUID = Field(foreign_key="events.event_id", primary_key=True)
     category_name: str = Field(foreign_key="event_categories.category_name", primary_key=True)
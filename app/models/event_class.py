@@ -1,10 +1,14 @@
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index
 from uuid import UUID, uuid4
 from decimal import Decimal
 from typing import Optional, List
 
 class EventClass(SQLModel, table=True):
     __tablename__ = "event_classes"  # Pastikan nama tabel sesuai
+    __table_args__ = (
+        Index("ix_event_classes_event_id_class_name", "event_id", "class_name"),
+    )
 
     event_class_id: UUID = Field(default_factory=uuid4, primary_key=True)
     event_id: UUID = Field(foreign_key="events.event_id")
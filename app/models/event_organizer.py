@@ -29,7 +29,7 @@ class EventOrganizer(SQLModel, table=True):
     company_experience: str
     company_portofolio: str
     status: OrganizerStatus = Field(default=OrganizerStatus.PENDING)
-    user_id: UUID = Field(foreign_key="users.user_id")
+    user_id: UUID = Field(foreign_key="users.user_id", index=True)
     verified_at: datetime = Field(default=None, nullable=True)
     # # Foreign Keys
     
@@ -15,7 +15,7 @@ class OTP(SQLModel, table=True):
 
     otp_id: Optional[int] = Field(default=None, primary_key=True)
     otp_code: str = Field(index=True, nullable=False)
-    user_id: UUID = Field(foreign_key="users.user_id", nullable=False)
+    user_id: UUID = Field(foreign_key="users.user_id", nullable=False, index=True)
     hashed_otp: str = Field(nullable=False)
     token_type: VerificationType = Field(nullable=False)
     created_at: datetime = Field(default=datetime.now)
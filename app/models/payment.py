@@ -1,4 +1,5 @@
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index
 from datetime import datetime
 from uuid import UUID, uuid4
 from enum import Enum
@@ -21,6 +22,9 @@ class PaymentMethodType(str, Enum):
 # Payment Model
 class Payment(SQLModel, table=True):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     payment_id: UUID = Field(default_factory=uuid4, primary_key=True)
     amount: float
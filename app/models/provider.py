@@ -1,5 +1,6 @@
 from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from app.models.user import User
 from uuid import UUID
 
@@ -18,6 +19,9 @@ class ProviderName(Enum):
 # Provider Model
 class Provider(SQLModel, table=True):
     __tablename__ = 'providers'
+    __table_args__ = (
+        Index("ix_providers_user_id_provider_name", "user_id", "provider_name"),
+    )
 
     provider_id: int = Field(default=None, primary_key=True)
     user_id: UUID = Field(foreign_key="users.user_id", nullable=False)
@@ -1,4 +1,5 @@
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Column, Index, LargeBinary
 from enum import Enum
 from datetime import datetime
 from uuid import uuid4, UUID
@@ -15,6 +16,10 @@ class Gender(Enum):
 
 class User(SQLModel, table=True):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Polling sinkronisasi face index di setiap worker
+        Index("ix_users_updated_at", "updated_at"),
+    )
 
     user_id: UUID = Field(default_factory=lambda: str(uuid4()), primary_key=True)
     full_name: str = Field(nullable=False)
@@ -27,7 +32,8 @@ class User(SQLModel, table=True):
     role: Role = Field(default=Role.USER)
     password_hash: str = Field(nullable=False, max_length=255)
     
-    embedding: str = Field(default=None, nullable=True)
+    embedding: str = Field(default=None, nullable=True)  # legacy JSON text, see embedding_vector
+    embedding_vector: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
     profile_picture: str = Field(default=None, nullable=True)
     email_verified_at: datetime = Field(default=None, nullable=True)
     
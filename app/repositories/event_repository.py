@@ -1,11 +1,21 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from sqlalchemy.orm import joinedload
-from typing import List, Optional
+from sqlalchemy import select, update, and_, or_, func, literal_column, table, column
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import joinedload, selectinload
+from typing import List, Optional, Tuple
+from datetime import datetime
 from uuid import UUID
 from app.models import Event, EventStatus, EventCategories, EventClass, EventCategoryAssociation
+from app.schemas.event import EventFilter
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.search import search_terms, to_tsquery, to_fts5_query, to_boolean_query
 from app.core.config import Logger
 
+# Harus sama persis dengan ekspresi index ix_events_search di PostgreSQL
+EVENT_SEARCH_VECTOR = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(location, ''))"
+# Tabel FTS5 external-content untuk SQLite
+events_fts = table("events_fts", column("rowid"), column("rank"))
+
 class EventRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -27,6 +37,23 @@ class EventRepository:
             self.logger.error(f"Error retrieving categories by names {category_names}: {str(e)}")
             raise
     
+    async def get_categories_by_names(self, category_names: List[str]) -> List[EventCategories]:
+        """
+        Retrieve the existing event categories among the given names in one query.
+        """
+        try:
+            self.logger.info(f"Attempting to retrieve categories by names: {category_names}")
+            if not category_names:
+                return []
+            result = await self.session.execute(
+                select(EventCategories)
+                .filter(EventCategories.category_name.in_(category_names))
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            self.logger.error(f"Error retrieving categories by names {category_names}: {str(e)}")
+            raise
+
     async def get_all_categories(self) -> List[str]:
         """
         Retrieve all event categories.
@@ -46,9 +73,11 @@ class EventRepository:
         """
         try:
             self.logger.info("Attempting to retrieve all events")
+            # Kategori dimuat dengan selectinload: join ke tabel asosiasi di dalam LEFT JOIN
+            # dimaterialisasi SQLite tanpa memakai primary key (lihat tests/test_query_plans.py)
             result = await self.session.execute(
                 select(Event)
-                .options(joinedload(Event.categories))
+                .options(selectinload(Event.categories))
                 .options(joinedload(Event.organizer))
                 .options(joinedload(Event.event_classes))
                 .order_by(Event.updated_at.desc())
@@ -67,7 +96,7 @@ class EventRepository:
             self.logger.info(f"Retrieving event with ID: {event_id}")
             result = await self.session.execute(
                 select(Event)
-                .options(joinedload(Event.categories))
+                .options(selectinload(Event.categories))
                 .options(joinedload(Event.organizer))
                 .options(joinedload(Event.event_classes))
                 .filter(Event.event_id == event_id)
@@ -85,7 +114,7 @@ class EventRepository:
             self.logger.info(f"Retrieving event with ID: {event_id} and organizer ID: {organizer_id}")
             result = await self.session.execute(
                 select(Event)
-                .options(joinedload(Event.categories))
+                .options(selectinload(Event.categories))
                 .options(joinedload(Event.organizer))
                 .options(joinedload(Event.event_classes))
                 .filter(Event.event_id == event_id)
@@ -104,7 +133,7 @@ class EventRepository:
             self.logger.info(f"Retrieving event with ID: {event_id} and status: {status}")
             result = await self.session.execute(
                 select(Event)
-                .options(joinedload(Event.categories))
+                .options(selectinload(Event.categories))
                 .options(joinedload(Event.organizer))
                 .options(joinedload(Event.event_classes))
                 .filter(Event.event_id == event_id)
@@ -125,7 +154,7 @@ class EventRepository:
             result = await self.session.execute(
                 select(Event)
                 .filter(Event.status.in_(status))
-                .options(joinedload(Event.categories))
+                .options(selectinload(Event.categories))
                 .options(joinedload(Event.organizer))
                 .options(joinedload(Event.event_classes))
                 .order_by(Event.updated_at.desc())
@@ -141,6 +170,103 @@ class EventRepository:
             self.logger.error(f"Error retrieving events by status {status}: {str(e)}")
             raise
 
+    async def get_event_page(self, status: List[EventStatus], filters: EventFilter, organizer_id: Optional[UUID] = None) -> Tuple[List[Event], Optional[str]]:
+        """
+        Retrieve one page of events ordered by (date, event_id), with the cursor of the next page.
+        """
+        try:
+            self.logger.info(f"Retrieving event page by status: {status}, filters: {filters.cache_key()}")
+            # Koleksi dimuat dengan selectinload agar LIMIT berlaku per event, bukan per baris join
+            query = (
+                select(Event)
+                .filter(Event.status.in_(status))
+                .options(joinedload(Event.organizer))
+                .options(selectinload(Event.categories))
+                .options(selectinload(Event.event_classes))
+            )
+            if organizer_id:
+                query = query.filter(Event.organizer_id == organizer_id)
+            if filters.category:
+                query = query.filter(Event.event_id.in_(
+                    select(EventCategoryAssociation.event_id)
+                    .filter(EventCategoryAssociation.category_name == filters.category)
+                ))
+            if filters.location:
+                query = query.filter(Event.location.ilike(f"%{filters.location}%"))
+            if filters.date_from:
+                query = query.filter(Event.date >= filters.date_from)
+            if filters.date_to:
+                query = query.filter(Event.date <= filters.date_to)
+            if filters.price_min is not None or filters.price_max is not None:
+                classes = select(EventClass.event_id)
+                if filters.price_min is not None:
+                    classes = classes.filter(EventClass.base_price >= filters.price_min)
+                if filters.price_max is not None:
+                    classes = classes.filter(EventClass.base_price <= filters.price_max)
+                query = query.filter(Event.event_id.in_(classes))
+            if filters.cursor:
+                date, event_id = decode_cursor(filters.cursor)
+                query = query.filter(or_(Event.date > date, and_(Event.date == date, Event.event_id > event_id)))
+
+            result = await self.session.execute(
+                query.order_by(Event.date, Event.event_id).limit(filters.limit + 1)
+            )
+            events = list(result.scalars().all())
+            next_cursor = None
+            if len(events) > filters.limit:
+                events = events[:filters.limit]
+                next_cursor = encode_cursor(events[-1].date, events[-1].event_id)
+            self.logger.info(f"Retrieved {len(events)} events for status: {status}")
+            return events, next_cursor
+        except Exception as e:
+            self.logger.error(f"Error retrieving event page by status {status}: {str(e)}")
+            raise
+
+    async def search_events(self, q: str, status: List[EventStatus], limit: int, offset: int = 0) -> List[Event]:
+        """
+        Full-text search over event name, description and location, best match first.
+
+        Every term must match, as a prefix. Uses the tsvector GIN index on PostgreSQL,
+        the FULLTEXT index on MySQL and the FTS5 table on SQLite.
+        """
+        try:
+            self.logger.info(f"Searching events for: {q}")
+            terms = search_terms(q)
+            if not terms:
+                return []
+            query = (
+                select(Event)
+                .filter(Event.status.in_(status))
+                .options(joinedload(Event.organizer))
+                .options(selectinload(Event.categories))
+                .options(selectinload(Event.event_classes))
+            )
+            dialect = self.session.get_bind().dialect.name
+            if dialect == "postgresql":
+                vector = literal_column(EVENT_SEARCH_VECTOR)
+                ts_query = func.to_tsquery("simple", to_tsquery(terms))
+                query = query.filter(vector.op("@@")(ts_query)).order_by(func.ts_rank_cd(vector, ts_query).desc())
+            elif dialect == "mysql":
+                relevance = match(Event.name, Event.description, Event.location, against=to_boolean_query(terms)).in_boolean_mode()
+                query = query.filter(relevance).order_by(relevance.desc())
+            elif dialect == "sqlite":
+                query = (
+                    query.join(events_fts, events_fts.c.rowid == literal_column("events.rowid"))
+                    .filter(literal_column("events_fts").op("MATCH")(to_fts5_query(terms)))
+                    .order_by(events_fts.c.rank)
+                )
+            else:
+                for term in terms:
+                    pattern = f"%{term}%"
+                    query = query.filter(or_(Event.name.ilike(pattern), Event.description.ilike(pattern), Event.location.ilike(pattern)))
+            result = await self.session.execute(query.order_by(Event.date, Event.event_id).limit(limit).offset(offset))
+            events = list(result.scalars().all())
+            self.logger.info(f"Found {len(events)} events for: {q}")
+            return events
+        except Exception as e:
+            self.logger.error(f"Error searching events for {q}: {str(e)}")
+            raise
+
     async def get_events_by_organizer_id(self, organizer_id: UUID) -> List[Event]:
         """
         Retrieve all events by organizer ID.
@@ -149,7 +275,7 @@ class EventRepository:
             self.logger.info(f"Retrieving events by organizer ID: {organizer_id}")
             result = await self.session.execute(
                 select(Event).filter(Event.organizer_id == organizer_id)
-                .options(joinedload(Event.categories))
+                .options(selectinload(Event.categories))
                 .options(joinedload(Event.organizer))
                 .options(joinedload(Event.event_classes))
                 .order_by(Event.updated_at.desc())
@@ -295,6 +421,42 @@ class EventRepository:
             self.logger.error(f"Error updating status for event with ID {event_id}: {str(e)}")
             raise
         
+    async def cancel_pending_events_before(self, cutoff: datetime, limit: int) -> List[UUID]:
+        """
+        Cancel up to limit PENDING events last updated before cutoff and return their IDs.
+
+        The caller commits; every call is one short statement (two on MySQL).
+        """
+        try:
+            stale = (
+                select(Event.event_id)
+                .filter(Event.status == EventStatus.PENDING)
+                .filter(Event.updated_at < cutoff)
+                .limit(limit)
+            )
+            stmt = (
+                update(Event)
+                .where(Event.status == EventStatus.PENDING)
+                .where(Event.updated_at < cutoff)
+                .values(status=EventStatus.CANCELLED)
+                .execution_options(synchronize_session=False)
+            )
+            if self.session.get_bind().dialect.update_returning:
+                # PostgreSQL dan SQLite: satu UPDATE dengan subquery LIMIT dan RETURNING
+                result = await self.session.execute(
+                    stmt.where(Event.event_id.in_(stale.scalar_subquery())).returning(Event.event_id)
+                )
+                return list(result.scalars().all())
+
+            # MySQL tidak mendukung RETURNING maupun LIMIT di subquery IN pada tabel yang sama
+            event_ids = list((await self.session.execute(stale)).scalars().all())
+            if event_ids:
+                await self.session.execute(stmt.where(Event.event_id.in_(event_ids)))
+            return event_ids
+        except Exception as e:
+            self.logger.error(f"Error cancelling pending events before {cutoff}: {str(e)}")
+            raise
+
     async def update_event_status(self, event_id: UUID, status: EventStatus) -> bool:
         """
         Update the status of an event.
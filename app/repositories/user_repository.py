@@ -2,11 +2,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, delete
 from app.models import User, Role
-from app.core.config import Logger
-from typing import Optional
+from app.core.config import Logger, settings
+from typing import List, Optional, Set, Tuple
 from datetime import datetime, timezone
 from fastapi import HTTPException  # Import HTTPException from FastAPI
-import json
+import numpy as np
+from app.utils.embedding_codec import encode_embedding, load_embedding
+from app.core.face_index import face_index, face_index_sync
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
@@ -124,6 +126,8 @@ class UserRepository:
                 self.logger.warning(f"User with id {user_id} not found for deletion.")
                 raise HTTPException(status_code=400, detail=f"User with id {user_id} not found for deletion.")
             self.logger.info(f"User with id {user_id} deleted successfully.")
+            if face_index.remove(user_id):
+                await face_index_sync.publish(user_id)
             return True
         except Exception as e:
             self.logger.error(f"Unexpected error deleting user with id {user_id}: {str(e)}")
@@ -131,26 +135,96 @@ class UserRepository:
         
     async def save_or_update_embedding(self, user_id: str, embedding: list):
         user = await self.get_user_by_id(user_id)
-        embedding_json = json.dumps(embedding)
+        embedding_vector = encode_embedding(embedding, settings.FACE_EMBEDDING_DTYPE)
 
         if user:
-            # Update existing user embedding
-            user.embedding = embedding_json
+            # Update existing user embedding, legacy JSON text is no longer written
+            user.embedding_vector = embedding_vector
+            user.embedding = None
             self.session.add(user)
         else:
             # Create a new user if not exists
-            new_user = User(user_id=user_id, embedding=embedding_json)
+            new_user = User(user_id=user_id, embedding_vector=embedding_vector)
             self.session.add(new_user)
 
         await self.session.commit()
+
+        # Perbarui index di worker ini dan beri tahu worker lain
+        face_index.upsert(user_id, embedding)
+        await face_index_sync.publish(user_id)
         
-    async def get_embedding_by_user_id(self, user_id: str) -> Optional[list]:
+    async def get_embedding_by_user_id(self, user_id: str) -> Optional[np.ndarray]:
         user = await self.get_user_by_id(user_id)
         if user:
-            return json.loads(user.embedding)
+            return load_embedding(user.embedding_vector, user.embedding)
         return None
     
-    async def get_all_embeddings(self) -> list:
-        
-        result = await self.session.execute(select(User))
-        return result.scalars().all()
+    async def get_all_embeddings(self) -> List[Tuple[str, np.ndarray]]:
+        """
+        Retrieve (user_id, embedding) pairs for every user with an enrolled face.
+        """
+        try:
+            self.logger.info("Attempting to retrieve all user embeddings")
+            result = await self.session.execute(
+                select(User.user_id, User.embedding_vector, User.embedding)
+                .where((User.embedding_vector.is_not(None)) | (User.embedding.is_not(None)))
+            )
+            embeddings = [
+                (str(user_id), load_embedding(vector, embedding))
+                for user_id, vector, embedding in result.all()
+            ]
+            self.logger.info(f"Retrieved {len(embeddings)} user embeddings")
+            return embeddings
+        except Exception as e:
+            self.logger.error(f"Error retrieving user embeddings: {str(e)}")
+            raise
+
+    async def get_enrolled_user_ids(self) -> Set[str]:
+        """
+        Retrieve the ids of every user with an enrolled face, without loading the embeddings.
+        """
+        try:
+            self.logger.debug("Attempting to retrieve enrolled user ids")
+            result = await self.session.execute(
+                select(User.user_id)
+                .where((User.embedding_vector.is_not(None)) | (User.embedding.is_not(None)))
+            )
+            return {str(user_id) for user_id in result.scalars().all()}
+        except Exception as e:
+            self.logger.error(f"Error retrieving enrolled user ids: {str(e)}")
+            raise
+
+    async def get_embeddings_by_user_ids(self, user_ids: List[str]) -> List[Tuple[str, Optional[np.ndarray]]]:
+        """
+        Retrieve (user_id, embedding) pairs for the given users. Missing embeddings are None.
+        """
+        try:
+            self.logger.info(f"Attempting to retrieve embeddings for {len(user_ids)} users")
+            result = await self.session.execute(
+                select(User.user_id, User.embedding_vector, User.embedding).where(User.user_id.in_(user_ids))
+            )
+            return [
+                (str(user_id), load_embedding(vector, embedding))
+                for user_id, vector, embedding in result.all()
+            ]
+        except Exception as e:
+            self.logger.error(f"Error retrieving embeddings for users {user_ids}: {str(e)}")
+            raise
+
+    async def get_embeddings_updated_since(self, since: Optional[datetime]) -> List[Tuple[str, Optional[np.ndarray]]]:
+        """
+        Retrieve (user_id, embedding) pairs for users updated after the given time.
+        """
+        try:
+            self.logger.debug(f"Attempting to retrieve embeddings updated since {since}")
+            query = select(User.user_id, User.embedding_vector, User.embedding)
+            if since is not None:
+                query = query.where(User.updated_at > since)
+            result = await self.session.execute(query)
+            return [
+                (str(user_id), load_embedding(vector, embedding))
+                for user_id, vector, embedding in result.all()
+            ]
+        except Exception as e:
+            self.logger.error(f"Error retrieving embeddings updated since {since}: {str(e)}")
+            raise
@@ -1,7 +1,7 @@
 from uuid import UUID
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from app.models import EventStatus, EventOrganizer, EventCategories, EventClass
 from app.schemas.response import ResponseSuccess
 from fastapi import UploadFile
@@ -109,6 +109,26 @@ class EventResponse(ResponseSuccess):
     class Config:
         from_attributes = True
 
+class EventListResponse(EventResponse):
+    next_cursor: Optional[str] = None
+
+class EventSearchResponse(EventResponse):
+    next_offset: Optional[int] = None
+
+class EventFilter(BaseModel):
+    category: Optional[str] = None
+    location: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    limit: int = Field(default=20, ge=1, le=100)
+    cursor: Optional[str] = None
+
+    def cache_key(self) -> str:
+        # Urutan field tetap, jadi filter yang sama selalu menghasilkan key yang sama
+        return "&".join(f"{name}={value}" for name, value in self.model_dump(mode="json", exclude_none=True).items())
+
 class EventClassCreate(BaseModel):
     class_name: str
     base_price: float
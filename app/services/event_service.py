@@ -4,12 +4,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from app.models import Role, Event, EventCategories, EventStatus, OrganizerStatus, EventClass, EventCategoryAssociation
 from app.repositories import EventOrganizerRepository, UserRepository, EventRepository
-from app.schemas.event import EventResponse, EventBase, EventCreate, EventUpdate, ChangeEventStatus
+from app.schemas.event import EventListResponse, EventSearchResponse, EventFilter, EventBase, EventCreate, EventUpdate, ChangeEventStatus
 from app.core.config import Logger
+from app.core.cache import event_cache, event_list_key, event_detail_key, invalidate_event
 from app.schemas.response import ResponseModel, ResponseSuccess
 from typing import Dict
 from app.services.cloudinary_service import CloudinaryService
 
+# Status event yang terlihat oleh publik
+PUBLIC_EVENT_STATUSES = [EventStatus.ACTIVE, EventStatus.COMPLETED, EventStatus.CANCELLED]
+
 class EventService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -25,33 +29,75 @@ class EventService:
             categories = await self.event_repository.get_all_categories()
             return ResponseSuccess(message="Event Categories retrieved successfully", data=categories)
         
-    async def get_all_events(self, current: Dict = None) -> EventResponse:
+    async def get_all_events(self, current: Dict = None, filters: EventFilter = None) -> EventListResponse:
+        filters = filters or EventFilter()
         async with self.session.begin():
             self.logger.info("Retrieving all Events")
 
+            next_cursor = None
             # If no user is provided, fetch all events
             if not current:
-                events = await self.event_repository.get_events_by_status([EventStatus.ACTIVE, EventStatus.COMPLETED, EventStatus.CANCELLED])
-                print(events)
+                events, next_cursor = await self.event_repository.get_event_page(PUBLIC_EVENT_STATUSES, filters)
             else:
                 user = await self.user_repository.get_user_by_id(current.get("sub"))
                 # Fetch events by status based on the current's role
                 if user.role == Role.EO:  # Event Organizer
                     self.logger.info(f"Retrieving events for Event Organizer {current.get('sub')}")
                     organizer = await self.organizer_repository.get_organizer_by_user_id(current.get("sub"))
-                    events = await self.event_repository.get_events_by_organizer(organizer.organizer_id, [EventStatus.ACTIVE, EventStatus.COMPLETED, EventStatus.CANCELLED])
+                    events, next_cursor = await self.event_repository.get_event_page(PUBLIC_EVENT_STATUSES, filters, organizer.organizer_id)
                 elif user.role == Role.ADMIN:  # Admin
                     self.logger.info(f"Retrieving events for Admin {current.get('sub')}")
-                    events = await self.event_repository.get_events_by_status([EventStatus.ACTIVE, EventStatus.COMPLETED, EventStatus.CANCELLED])
+                    events, next_cursor = await self.event_repository.get_event_page(PUBLIC_EVENT_STATUSES, filters)
                 else:
                     self.logger.warning(f"User {current.get('sub')} has an unauthorized role")
                     events = []
                     
-            if not events:
+            if not events and not filters.cursor:
                 self.logger.warning(f"No events found for user {current.get('sub') if current else 'unknown'}")
                 raise HTTPException(status_code=404, detail="No events found")
 
-            return EventResponse(message="Events retrieved successfully", data=[EventBase.model_validate(event) for event in events])
+            return EventListResponse(
+                message="Events retrieved successfully",
+                data=[EventBase.model_validate(event) for event in events],
+                next_cursor=next_cursor,
+            )
+
+    async def search_events(self, q: str, limit: int = 20, offset: int = 0) -> EventSearchResponse:
+        async with self.session.begin():
+            self.logger.info(f"Searching public Events for: {q}")
+            # Ambil satu baris lebih untuk tahu apakah masih ada halaman berikutnya
+            events = await self.event_repository.search_events(q, PUBLIC_EVENT_STATUSES, limit + 1, offset)
+            next_offset = offset + limit if len(events) > limit else None
+            return EventSearchResponse(
+                message="Events retrieved successfully",
+                data=[EventBase.model_validate(event) for event in events[:limit]],
+                next_offset=next_offset,
+            )
+
+    async def get_public_events(self, filters: EventFilter = None) -> bytes:
+        """
+        Return one page of the public event catalogue as rendered JSON, served from the event cache when possible.
+        """
+        filters = filters or EventFilter()
+        key = event_list_key(PUBLIC_EVENT_STATUSES, filters.cache_key())
+        body = await event_cache.get(key)
+        if body is None:
+            response = await self.get_all_events(filters=filters)
+            body = response.model_dump_json().encode()
+            await event_cache.set(key, body)
+        return body
+
+    async def get_public_event(self, event_id: str) -> bytes:
+        """
+        Return the public detail of an event as rendered JSON, served from the event cache when possible.
+        """
+        key = event_detail_key(event_id)
+        body = await event_cache.get(key)
+        if body is None:
+            response = await self.get_event_by_id(event_id)
+            body = response.model_dump_json().encode()
+            await event_cache.set(key, body)
+        return body
     
     async def create_event(self, event: EventCreate, currentuser: Dict) -> ResponseSuccess:
         """
@@ -79,7 +125,8 @@ class EventService:
             )
                 # Add event to repository and commit
             created_event = await self.event_repository.create_event(event_data)
-            await self.session.commit()
+            # Baris event harus ada sebelum kelas dan asosiasi kategorinya
+            await self.session.flush()
             
             for event_class in event.event_classes:
                 event_class_data = EventClass(
@@ -89,20 +136,17 @@ class EventService:
                     count=event_class.count
                 )
                 await self.event_repository.create_event_class(event_class_data)
-                await self.session.commit()
             
-            # Add event categories
-            for category in event.categories:
-                # Check if category exists
-                category_exists = await self.event_repository.get_categories_by_name(category)
-                if category_exists:
-                    # If category exists, create association
-                    association = EventCategoryAssociation(event_id=created_event.event_id, category_name=category)
-                    await self.event_repository.create_event_category_association(association)
-                    await self.session.commit()
-                    
+            # Add event categories; unknown categories are skipped
+            for category in await self.event_repository.get_categories_by_names(event.categories):
+                association = EventCategoryAssociation(event_id=created_event.event_id, category_name=category.category_name)
+                await self.event_repository.create_event_category_association(association)
+            
+            # Satu commit untuk event, kelas dan kategorinya
+            await self.session.commit()
             
             event = await self.event_repository.get_event_by_id(created_event.event_id)
+            await invalidate_event(created_event.event_id)
             
             # Return success response
             return ResponseSuccess(message="Event created successfully", data=EventBase.model_validate(event))  
@@ -126,7 +170,7 @@ class EventService:
             # Log incoming event data
             self.logger.info(f"Updating event with ID: {event.event_id}")
             
-            event_data = await self.event_repository.get_event_by_id(event.event_id)
+            event_data = await self.event_repository.get_event_by_id(UUID(event.event_id))
             if not event_data:
                 self.logger.error(f"Event not found with ID: {event.event_id}")
                 raise HTTPException(status_code=404, detail="Event not found")
@@ -142,44 +186,32 @@ class EventService:
             event_data.description = event.description
             event_data.date = event.date
             
-            # Update event classes
+            # Update event classes; the classes are already loaded with the event
+            event_classes = {event_class.class_name: event_class for event_class in event_data.event_classes}
             for event_class in event.event_classes:
-                event_class_data = await self.event_repository.get_event_class_by_id_and_name(event.event_id, event_class.class_name)
+                event_class_data = event_classes.get(event_class.class_name)
                 if event_class_data:
                     # Update existing event class
-                    event_class_data.class_name = event_class.class_name
                     event_class_data.base_price = event_class.base_price
                     event_class_data.count = event_class.count
                     event_class_data.description = event_class.description
                 else:
                     # Create new event class
                     new_event_class = EventClass(
-                        event_id=event.event_id,
+                        event_id=event_data.event_id,
                         class_name=event_class.class_name,
                         base_price=event_class.base_price,
                         count=event_class.count,
                         description=event_class.description
                     )
                     await self.event_repository.create_event_class(new_event_class)
-                await self.session.commit()
-                    
                 
-            # Update event categories
-            for category in event.categories:
-                # Check if category exists and delete if not in the list
-                category_exists = await self.event_repository.get_categories_by_name(category)
-                if category_exists:
-                    # If category exists, create association
-                    association = EventCategoryAssociation(event_id=event.event_id, category_name=category)
-                    await self.event_repository.create_event_category_association(association)
-                    await self.session.commit()
-                else:
-                    # Delete association
-                    await self.event_repository.delete_event_category_association(event.event_id, category)
-                    await self.session.commit()
+            # Update event categories: keep the existing ones in the list, drop the rest
+            event_data.categories = await self.event_repository.get_categories_by_names(event.categories)
                     
             # Commit changes
             await self.session.commit()
+            await invalidate_event(event.event_id)
             
             # Return success response
             return ResponseSuccess(message="Event updated successfully", data=EventBase.model_validate(event_data))
@@ -229,6 +261,9 @@ class EventService:
     async def change_event_status(self, event_id:str, event_status: ChangeEventStatus, current: Dict) -> ResponseSuccess:
         """
         Change the status of an event.
+
+        The event is identified only by the event_id of the URL, which is also the
+        cache entry invalidated afterwards; the body carries just the new status.
         """
         try:
             # Check if the user is an Event Organizer
@@ -243,21 +278,22 @@ class EventService:
                 # Fetch event based on organizer's ID
                 event = await self.event_repository.get_event_by_id(event_id)
                 if not event or event.organizer_id != organizer.organizer_id:
-                    self.logger.error(f"Event {event_status.event_id} not found or unauthorized")
+                    self.logger.error(f"Event {event_id} not found or unauthorized")
                     raise HTTPException(status_code=404, detail="Event not found")
                 
                 # Update event status
                 if event_status.status in [EventStatus.CANCELLED, EventStatus.COMPLETED]:
-                    await self.event_repository.update_status(event_status.event_id, event_status.status)
+                    await self.event_repository.update_status(event_id, event_status.status)
             
             elif user.role == Role.ADMIN:
-                event = await self.event_repository.get_event_by_id(event_status.event_id)
+                event = await self.event_repository.get_event_by_id(event_id)
                 if not event:
-                    self.logger.error(f"Event {event_status.event_id} not found")
+                    self.logger.error(f"Event {event_id} not found")
                     raise HTTPException(status_code=404, detail="Event not found")
                 
-                await self.event_repository.update_status(event_status.event_id, event_status.status)
+                await self.event_repository.update_status(event_id, event_status.status)
             
+            await invalidate_event(event_id)
             return ResponseSuccess(message="Event status updated successfully", data=EventBase.model_validate(event))
         except Exception as e:
             await self.session.rollback()
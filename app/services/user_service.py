@@ -1,19 +1,20 @@
+import asyncio
 import numpy as np
-import base64
-import json
 import time
-import cv2
 from app.repositories.user_repository import UserRepository
-from app.core.face_recognition import calculate_embedding, check_blink, check_turn_left, check_turn_right, check_look_straight, face_mesh
+from app.core.face_recognition import face_box, check_blink, check_turn_left, check_turn_right, check_look_straight
+from app.core.face_index import face_index, normalize
+from app.core.face_protocol import FaceSession
+from app.core.inference import embedding_batcher, InferenceTimeoutError, StageTimings
 from fastapi import WebSocket
 from app.core.security import verify_jwt_token
-from sklearn.metrics.pairwise import cosine_similarity
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import EditUserProfile
 from typing import Dict
 from fastapi import HTTPException
 from app.services.cloudinary_service import CloudinaryService
 from app.schemas.response import ResponseSuccess
+from app.core.config import Logger, settings
 
 ACTIONS = ["look_straight", "blink", "turn_left", "turn_right", "look_straight"]
 ACTION_MESSAGES = {
@@ -22,6 +23,16 @@ ACTION_MESSAGES = {
     "turn_left": "Please turn your head left",
     "turn_right": "Please turn your head right",
 }
+ACTION_CHECKS = {
+    "look_straight": check_look_straight,
+    "blink": check_blink,
+    "turn_left": check_turn_left,
+    "turn_right": check_turn_right,
+}
+SERVER_BUSY_MESSAGE = {
+    "status": "server_busy",
+    "message": "Server is busy, please hold still",
+}
 
 class UserService:
     def __init__(self, session: AsyncSession):
@@ -29,18 +40,24 @@ class UserService:
         self.user_repository = UserRepository(session)
         self.cloudinary_service = CloudinaryService()
         self.verfication_thresshold = 0.7
+        self.logger = Logger(__name__).get_logger()
+
+    def face_box(self, landmarks):
+        # Tanpa crop, FaceNet menerima seluruh frame (perilaku sebelum crop-to-face)
+        return face_box(landmarks) if settings.FACE_CROP_TO_FACE else None
 
     async def register_face_user(self, websocket: WebSocket, token: str):
-        await websocket.accept()
+        face_session = FaceSession(websocket)
+        await face_session.start()
         
         # Cari user berdasarkan token
         current_user = verify_jwt_token(token)
         if not current_user:
-            await websocket.send_json({
+            await face_session.send_json({
                 "status": "error",
                 "message": "Invalid token"
             })
-            await websocket.close()
+            await face_session.close()
             return
         
         user_id = current_user.get("sub")
@@ -48,9 +65,10 @@ class UserService:
         current_action_index = 0
         start_time = time.time()
         embeddings = []
+        timings = StageTimings()
 
         # Kirim action pertama
-        await websocket.send_json({
+        await face_session.send_json({
             "status": "action_required",
             "action": ACTIONS[0],
             "message": ACTION_MESSAGES[ACTIONS[0]],
@@ -61,18 +79,19 @@ class UserService:
             while current_action_index < len(ACTIONS) and time.time() - start_time <= 40:
                 current_action = ACTIONS[current_action_index]
 
-                data = await websocket.receive_text()
-                frame_data = json.loads(data)
-                img_bytes = base64.b64decode(frame_data['image'].split(',')[1])
-                nparr = np.frombuffer(img_bytes, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                frame = await face_session.next_frame()
+                timings.count("frames")
 
-                # Proses face landmarks
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = face_mesh.process(rgb_frame)
+                # Tahap 1: landmark wajah (murah) di inference worker
+                try:
+                    with timings.measure("landmarks"):
+                        landmarks = await face_session.detect_landmarks(frame)
+                except InferenceTimeoutError:
+                    await face_session.send_json(SERVER_BUSY_MESSAGE)
+                    continue
 
-                if not results.multi_face_landmarks:
-                    await websocket.send_json({
+                if landmarks is None:
+                    await face_session.send_json({
                         "status": "no_face_detected",
                         "action": current_action,
                         "message": "No face detected, please position your face in the frame",
@@ -80,25 +99,27 @@ class UserService:
                     })
                     continue
 
-                landmarks = results.multi_face_landmarks[0]
-                embedding = calculate_embedding(frame)
+                # Tahap 2: cek liveness dari landmark
+                with timings.measure("liveness"):
+                    action_completed = bool(ACTION_CHECKS[current_action](landmarks))
 
-                action_completed = False
-                if current_action == "blink" and check_blink(landmarks):
-                    action_completed = True
-                elif current_action == "turn_left" and check_turn_left(landmarks):
-                    action_completed = True
-                elif current_action == "turn_right" and check_turn_right(landmarks):
-                    action_completed = True
-                elif current_action == "look_straight" and check_look_straight(landmarks):
-                    action_completed = True
+                # Tahap 3: FaceNet hanya untuk frame yang menyelesaikan action
+                if action_completed:
+                    try:
+                        with timings.measure("embedding"):
+                            embedding = await embedding_batcher.embed(frame.image, self.face_box(landmarks), frame.width, frame.height)
+                    except InferenceTimeoutError:
+                        await face_session.send_json(SERVER_BUSY_MESSAGE)
+                        continue
+                else:
+                    timings.count("embeddings_skipped")
 
                 if action_completed:
                     embeddings.append(embedding)
                     current_action_index += 1
 
                     if current_action_index < len(ACTIONS):
-                        await websocket.send_json({
+                        await face_session.send_json({
                             "status": "action_completed",
                             "action": ACTIONS[current_action_index],
                             "message": ACTION_MESSAGES[ACTIONS[current_action_index]],
@@ -109,13 +130,13 @@ class UserService:
                         # Save or update the user's embedding in the database
                         await self.user_repository.save_or_update_embedding(user_id, mean_embedding)
 
-                        await websocket.send_json({
+                        await face_session.send_json({
                             "status": "registration_completed",
                             "message": "Registration successfully completed",
                             "progress": 100
                         })
                 else:
-                    await websocket.send_json({
+                    await face_session.send_json({
                         "status": "action_required",
                         "action": current_action,
                         "message": ACTION_MESSAGES[current_action],
@@ -124,40 +145,42 @@ class UserService:
 
         except Exception as e:
             print(f"Error during registration: {e}")
-            await websocket.send_json({
+            await face_session.send_json({
                 "status": "error",
                 "message": str(e)
             })
         finally:
-            await websocket.close()
+            timings.count("frames_dropped", face_session.dropped)
+            self.logger.info(f"Face registration stage report for user {user_id}: {timings.report()}")
+            await face_session.close()
             
     async def verify_face_user(self, websocket: WebSocket, token: str):
         
-        await websocket.accept()        
+        face_session = FaceSession(websocket)
+        await face_session.start()
         
         # Cari user berdasarkan token
         current_user = verify_jwt_token(token)
         if not current_user:
-            await websocket.send_json({
+            await face_session.send_json({
                 "status": "error",
                 "message": "Invalid token"
             })
-            await websocket.close()
+            await face_session.close()
             return
         
         user_id = current_user.get("sub")
         
         stored_embedding = await self.user_repository.get_embedding_by_user_id(user_id) 
         
-        if not stored_embedding:
-            await websocket.send_json({
+        if stored_embedding is None:
+            await face_session.send_json({
                 "status": "error",
                 "message": "User not found"
             })
-            await websocket.close()
+            await face_session.close()
             return
-        
-        stored_embedding = np.array(json.loads(str(stored_embedding)))
+        stored_embedding = normalize(stored_embedding)
         
         verification_start_time = time.time()
         attempt_count = 0
@@ -165,35 +188,31 @@ class UserService:
         
         try:
             while attempt_count < max_attempts and time.time() - verification_start_time <= 40:
-                data = await websocket.receive_text()
-                frame_data = json.loads(data)
-                img_bytes = base64.b64decode(frame_data['image'].split(',')[1])
-                nparr = np.frombuffer(img_bytes, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                frame = await face_session.next_frame()
                 
-                # Proses gambar dan ekstrak embedding
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = face_mesh.process(rgb_frame)
+                # Proses gambar dan ekstrak embedding di inference worker
+                try:
+                    landmarks = await face_session.detect_landmarks(frame)
+                    current_embedding = await embedding_batcher.embed(frame.image, self.face_box(landmarks), frame.width, frame.height) if landmarks is not None else None
+                except InferenceTimeoutError:
+                    await face_session.send_json(SERVER_BUSY_MESSAGE)
+                    continue
                 
-                if not results.multi_face_landmarks:
+                if landmarks is None:
                     attempt_count += 1
-                    await websocket.send_json({
+                    await face_session.send_json({
                         "status": "no_face_detected",
                         "message": "No face detected, please position your face in the frame",
                         "attempts_left": max_attempts - attempt_count
                     })
                     continue
                 
-                current_embedding = calculate_embedding(frame)
-                current_embedding = np.array(current_embedding).reshape(1, -1)
-                stored_embedding_reshaped = stored_embedding.reshape(1, -1)
-                
-                # Menghitung similarity score
-                similarity_score = cosine_similarity(current_embedding, stored_embedding_reshaped)[0][0]
+                # Menghitung similarity score (cosine similarity)
+                similarity_score = float(np.dot(normalize(current_embedding), stored_embedding))
                 print(f"Similarity Score: {similarity_score}")
                 
                 if similarity_score > self.verfication_thresshold:
-                    await websocket.send_json({
+                    await face_session.send_json({
                         "status": "verification_successful",
                         "message": "Verification successful",
                         "confidence": float(similarity_score),
@@ -202,7 +221,7 @@ class UserService:
                     break
                 else:
                     # attempt_count += 1
-                    await websocket.send_json({
+                    await face_session.send_json({
                         "status": "verification_failed",
                         "message": f"Processing verification... ",
                         "confidence": float(similarity_score),
@@ -211,73 +230,68 @@ class UserService:
                 
         except Exception as e:
             print(f"Error during verification: {e}")
-            await websocket.send_json({
+            await face_session.send_json({
                 "status": "error",
                 "message": str(e)
             })
         finally:
-            await websocket.close()
+            await face_session.close()
     
     async def detection_face(self, websocket: WebSocket):
-        await websocket.accept()
+        face_session = FaceSession(websocket)
+        await face_session.start()
         
         attempt_count = 0
         max_attempts = 6
         
         try:
             while True:
-                data = await websocket.receive_text()
-                frame_data = json.loads(data)
-                
-                img_bytes = base64.b64decode(frame_data['image'].split(',')[1])
-                nparr = np.frombuffer(img_bytes, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                frame = await face_session.next_frame()
                 
-                # Proses gambar dan ekstrak embedding
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = face_mesh.process(rgb_frame)
+                # Proses gambar dan ekstrak embedding di inference worker
+                try:
+                    landmarks = await face_session.detect_landmarks(frame)
+                    current_embedding = await embedding_batcher.embed(frame.image, self.face_box(landmarks), frame.width, frame.height) if landmarks is not None else None
+                except InferenceTimeoutError:
+                    await face_session.send_json(SERVER_BUSY_MESSAGE)
+                    continue
                 
-                if not results.multi_face_landmarks:
+                if landmarks is None:
                     attempt_count += 1
-                    await websocket.send_json({
+                    await face_session.send_json({
                         "status": "no_face_detected",
                         "message": f"No face detected. Attempts left: {max_attempts - attempt_count}",
                         "attempts_left": max_attempts - attempt_count
                     })
                     continue
                 
-                current_embedding = calculate_embedding(frame)
-                current_embedding = np.array(current_embedding).reshape(1, -1)
-                # Ambil semua data user embedding dari database
-                users_data = await self.user_repository.get_all_embeddings()
+                # Cari user terdekat di index embedding yang ada di memori, di luar event loop
+                if not face_index.loaded:
+                    await asyncio.to_thread(face_index.load, await self.user_repository.get_all_embeddings())
+                matches = await asyncio.to_thread(face_index.search, current_embedding, 1)
                 user_found = False
-                print("Total users: ", len(users_data))
-                
-                for user_data in users_data:
-                    stored_embedding = np.array(json.loads(str(user_data.embedding))).reshape(1, -1)
-                    
-                    # Hitung kesamaan dengan embedding yang ada
-                    similarity_score = cosine_similarity(current_embedding, stored_embedding)[0][0]
-                    print(similarity_score)
-                    if similarity_score > self.verfication_thresshold:
+
+                if matches and matches[0][1] > self.verfication_thresshold:
+                    matched_user_id, similarity_score = matches[0]
+                    matched_user = await self.user_repository.get_user_by_id(matched_user_id)
+                    if matched_user:
                         user_found = True
-                        await websocket.send_json({
+                        await face_session.send_json({
                             "status": "user_found",
-                            "message": f"User {user_data.full_name} detected",
+                            "message": f"User {matched_user.full_name} detected",
                             "confidence": float(similarity_score),
                             "attempts_left": max_attempts - attempt_count
                         })
-                        break
-                
+
                 if not user_found:
                     # attempt_count += 1
-                    await websocket.send_json({
+                    await face_session.send_json({
                         "status": "user_not_found",
                         "message": "No matching user found. Please try again.",
                     })
                 
                 if attempt_count >= max_attempts:
-                    await websocket.send_json({
+                    await face_session.send_json({
                         "status": "unknown_user",
                         "message": "User not recognized after 3 attempts.",
                         # "attempts_left": 0
@@ -287,12 +301,12 @@ class UserService:
                 
         except Exception as e:
             print(f"Error during detection: {e}")
-            await websocket.send_json({
+            await face_session.send_json({
                 "status": "error",
                 "message": str(e)
             })
         finally:
-            await websocket.close()
+            await face_session.close()
             
     async def update_user(self, data: EditUserProfile, current: Dict):
         # Fetch current user using the sub from JWT token
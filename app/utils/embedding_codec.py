@@ -0,0 +1,44 @@
+import json
+import numpy as np
+from typing import Optional, Sequence
+
+# FaceNet (keras-facenet) menghasilkan embedding 512 dimensi
+EMBEDDING_DIM = 512
+
+SUPPORTED_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+}
+
+
+def encode_embedding(embedding: Sequence[float], dtype: str = "float32") -> bytes:
+    """
+    Serialize an embedding into raw little-endian bytes (2 KB for float32, 1 KB for float16).
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    return np.asarray(embedding, dtype=SUPPORTED_DTYPES[dtype]).reshape(-1).tobytes()
+
+
+def decode_embedding(data: bytes, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Read an embedding stored by encode_embedding without copying the buffer.
+
+    The dtype is derived from the byte length, so float32 and float16 rows can
+    coexist in the same column. The returned array is a read-only view.
+    """
+    for dtype in SUPPORTED_DTYPES.values():
+        if len(data) == dim * dtype.itemsize:
+            return np.frombuffer(data, dtype=dtype)
+    raise ValueError(f"Invalid embedding size: {len(data)} bytes")
+
+
+def load_embedding(vector: Optional[bytes], legacy_json: Optional[str] = None) -> Optional[np.ndarray]:
+    """
+    Return the embedding of a user row, preferring the binary column over the legacy JSON text.
+    """
+    if vector:
+        return decode_embedding(vector)
+    if legacy_json:
+        return np.asarray(json.loads(legacy_json), dtype=np.float32)
+    return None
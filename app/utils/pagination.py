@@ -0,0 +1,23 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+from app.core.exception import BadRequestException
+
+
+def encode_cursor(date: datetime, event_id: UUID) -> str:
+    """
+    Encode the (date, event_id) sort key of the last row of a page into an opaque cursor.
+    """
+    payload = json.dumps({"date": date.isoformat(), "id": str(event_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["date"]), UUID(payload["id"])
+    except Exception:
+        raise BadRequestException("Invalid cursor")
@@ -0,0 +1,29 @@
+import re
+from typing import List
+
+# Hanya huruf dan angka yang diteruskan ke query full-text, sisanya dianggap pemisah
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+
+
+def search_terms(q: str) -> List[str]:
+    """
+    Split a search string into lowercase terms, dropping operators and punctuation.
+    """
+    return [term.lower() for term in TOKEN_PATTERN.findall(q or "")][:MAX_TERMS]
+
+
+def to_tsquery(terms: List[str]) -> str:
+    # PostgreSQL: semua term wajib ada dan dicocokkan sebagai prefix
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def to_fts5_query(terms: List[str]) -> str:
+    # SQLite FTS5: term di dalam tanda kutip agar tidak dibaca sebagai operator
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def to_boolean_query(terms: List[str]) -> str:
+    # MySQL FULLTEXT boolean mode
+    return " ".join(f"+{term}*" for term in terms)
+
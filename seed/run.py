@@ -7,7 +7,7 @@ from seed.seeders.event_seeder import create_events
 from seed.delete import delete_all
 from seed.seeders.payment_seeder import create_payments
 # Initialize the database engine with settings from config
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, echo=True)
+engine = create_engine(settings.SYNC_DATABASE_URI, pool_pre_ping=True, echo=True)
 
 # Create a session local for interacting with the database
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
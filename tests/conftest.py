@@ -0,0 +1,125 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+# Settings dibaca saat app diimpor, jadi environment test harus diset lebih dulu
+TEST_DIR = tempfile.mkdtemp(prefix="fest-ticketing-test-")
+os.environ.update({
+    "DB_CONNECTION": "sqlite",
+    "DB_NAME": os.path.join(TEST_DIR, "test"),
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "SECRET_KEY": "test-secret",
+    "CLOUDINARY_CLOUD_NAME": "test",
+    "CLOUDINARY_API_KEY": "test",
+    "CLOUDINARY_API_SECRET": "test",
+    "REDIS_URL": "",
+    "CACHE_BACKEND": "memory",
+    "LOG_FILE": "",
+    "QUERY_BUDGET_MODE": "raise",
+    "FACE_INDEX_STORE_PATH": os.path.join(TEST_DIR, "face_embeddings.bin"),
+    "FACE_ANN_INDEX_PATH": os.path.join(TEST_DIR, "face_ann"),
+})
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Event, EventOrganizer, EventStatus, OrganizerStatus, User  # noqa: E402
+from app.models.user import Gender  # noqa: E402
+
+# Tabel FTS5 dan trigger dari migration b71e4c9d2a55, yang tidak ada di metadata SQLModel
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE events_fts USING fts5(name, description, location, content='events', content_rowid='rowid')",
+    "CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, name, description, location) VALUES (new.rowid, new.name, new.description, new.location); END",
+    "CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+    "VALUES ('delete', old.rowid, old.name, old.description, old.location); END",
+    "CREATE TRIGGER events_fts_update AFTER UPDATE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+    "VALUES ('delete', old.rowid, old.name, old.description, old.location); "
+    "INSERT INTO events_fts(rowid, name, description, location) "
+    "VALUES (new.rowid, new.name, new.description, new.location); END",
+]
+
+
+@pytest.fixture(scope="session")
+def sync_engine():
+    engine = create_engine(settings.SYNC_DATABASE_URI)
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for statement in SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def organizer(sync_engine):
+    with Session(sync_engine, expire_on_commit=False) as session:
+        user = User(
+            user_id=uuid4(),
+            full_name="Test Organizer",
+            email="organizer@example.com",
+            gender=Gender.FEMALE,
+            password_hash="not-a-real-hash",
+        )
+        session.add(user)
+        session.flush()
+        organizer = EventOrganizer(
+            company_name="Test Organizer",
+            company_address="Jakarta",
+            company_pic="Test",
+            company_email="organizer@example.com",
+            company_phone="0800000000",
+            company_experience="-",
+            company_portofolio="-",
+            status=OrganizerStatus.ACTIVE,
+            user_id=user.user_id,
+        )
+        session.add(organizer)
+        session.commit()
+        return organizer
+
+
+@pytest.fixture
+def create_events(sync_engine, organizer):
+    """
+    Insert events with the given names and return them; they are deleted after the test.
+    """
+    created = []
+
+    def create(*names: str, status: EventStatus = EventStatus.ACTIVE):
+        with Session(sync_engine, expire_on_commit=False) as session:
+            events = [
+                Event(
+                    name=name,
+                    description=f"{name} description",
+                    location="Jakarta",
+                    status=status,
+                    date=datetime.now() + timedelta(days=30 + i),
+                    image="https://example.com/event.jpg",
+                    organizer_id=organizer.organizer_id,
+                )
+                for i, name in enumerate(names)
+            ]
+            session.add_all(events)
+            session.commit()
+        created.extend(events)
+        return events
+
+    yield create
+    with Session(sync_engine) as session:
+        for event in created:
+            session.delete(session.get(Event, event.event_id))
+        session.commit()
+
+
+@pytest.fixture
+def client(sync_engine):
+    # Tanpa context manager agar lifespan (scheduler, face services) tidak dijalankan
+    return TestClient(app)
@@ -0,0 +1,24 @@
+from app.models import EventStatus
+
+
+def test_search_returns_next_offset_until_the_last_page(client, create_events):
+    create_events("Jazz Night", "Jazz Festival", "Jazz Weekend")
+
+    first = client.get("/api/v1/event/search", params={"q": "jazz", "limit": 2})
+    assert first.status_code == 200
+    assert len(first.json()["data"]) == 2
+    assert first.json()["next_offset"] == 2
+
+    last = client.get("/api/v1/event/search", params={"q": "jazz", "limit": 2, "offset": 2})
+    assert last.status_code == 200
+    assert len(last.json()["data"]) == 1
+    assert last.json()["next_offset"] is None
+
+
+def test_search_skips_events_that_are_not_public(client, create_events):
+    create_events("Rock Preview", status=EventStatus.PENDING)
+
+    response = client.get("/api/v1/event/search", params={"q": "rock"})
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+    assert response.json()["next_offset"] is None
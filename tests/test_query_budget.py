@@ -0,0 +1,152 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from fastapi import UploadFile
+from prometheus_client import REGISTRY
+from sqlalchemy import delete, text
+from sqlmodel import Session
+from app.api.v1.endpoints.event import create_event, search_events, update_event
+from app.core.query_budget import QueryBudgetExceeded, track_queries
+from app.core.query_log import slow_query_log
+from app.dependencies.database import AsyncSessionLocal, engine
+from app.models import Event, EventCategories, EventCategoryAssociation, EventClass
+from app.schemas.event import EventClassCreate, EventCreate, EventUpdate
+from app.services.cloudinary_service import CloudinaryService
+from app.services.event_service import EventService
+
+SEARCH_ROUTE = "/api/v1/event/search"
+CATEGORIES = ["Music", "Jazz", "Outdoor"]
+
+
+def search_queries_observed() -> float:
+    return REGISTRY.get_sample_value("db_queries_per_request_sum", {"route": SEARCH_ROUTE}) or 0.0
+
+
+def test_search_stays_within_its_query_budget(client, create_events):
+    create_events("Blues Night", "Blues Festival")
+    before = search_queries_observed()
+
+    response = client.get(SEARCH_ROUTE, params={"q": "blues"})
+
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 2
+    # Statement dihitung lewat greenlet SQLAlchemy dan dicatat di bawah template route
+    issued = search_queries_observed() - before
+    assert 0 < issued <= search_events.query_budget
+
+
+def test_search_over_its_query_budget_raises(client, create_events, monkeypatch):
+    create_events("Blues Matinee")
+    monkeypatch.setattr(search_events, "query_budget", 1)
+
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        client.get(SEARCH_ROUTE, params={"q": "blues"})
+
+    assert f"GET {SEARCH_ROUTE}" in str(excinfo.value)
+    assert excinfo.value.queries.count > 1
+
+
+def test_one_timing_hook_feeds_the_budget_and_the_slow_query_log(monkeypatch):
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0)
+    monkeypatch.setattr(slow_query_log, "sample_rate", 1.0)
+    slow_before = slow_query_log.slow
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            async with track_queries(name="select_one") as queries:
+                await session.execute(text("SELECT 1"))
+        return queries
+
+    queries = asyncio.run(run())
+
+    assert len(engine.sync_engine.dispatch.after_cursor_execute) == 1
+    assert queries.count == 1
+    assert slow_query_log.slow - slow_before == 1
+
+
+@pytest.fixture
+def event_writes(sync_engine, organizer, monkeypatch):
+    """
+    Run EventService writes as the test organizer; the events they create are deleted after the test.
+    """
+    monkeypatch.setattr(CloudinaryService, "upload_image", lambda self, *args, **kwargs: {"secure_url": "https://example.com/event.jpg"})
+    with Session(sync_engine) as session:
+        for name in CATEGORIES:
+            session.merge(EventCategories(category_name=name))
+        session.commit()
+
+    current = {"sub": organizer.user_id}
+    event_ids = []
+
+    def run(method: str, payload, budget: int):
+        async def call():
+            async with AsyncSessionLocal() as session:
+                async with track_queries(budget=budget, name=method) as queries:
+                    response = await getattr(EventService(session), method)(payload, current)
+            return response, queries
+
+        response, queries = asyncio.run(call())
+        event_ids.append(response.data.event_id)
+        return response, queries
+
+    yield run
+    with Session(sync_engine) as session:
+        for table in (EventCategoryAssociation, EventClass):
+            session.exec(delete(table).where(table.event_id.in_(event_ids)))
+        session.exec(delete(Event).where(Event.event_id.in_(event_ids)))
+        session.commit()
+
+
+def event_image() -> UploadFile:
+    return UploadFile(file=io.BytesIO(b"image"), filename="event.jpg", size=5)
+
+
+def event_classes(*names: str) -> List[EventClassCreate]:
+    return [EventClassCreate(class_name=name, base_price=100000.0, count=50) for name in names]
+
+
+def test_create_event_with_classes_and_categories_stays_within_its_budget(event_writes):
+    event = EventCreate(
+        name="Budget Fest",
+        description="Budget Fest description",
+        location="Jakarta",
+        categories=CATEGORIES + ["Unknown"],
+        date=datetime.now() + timedelta(days=30),
+        event_classes=event_classes("Regular", "VIP", "VVIP", "Backstage"),
+        image=event_image(),
+    )
+
+    response, queries = event_writes("create_event", event, create_event.query_budget)
+
+    assert set(response.data.categories) == set(CATEGORIES)
+    assert len(response.data.event_classes) == 4
+    # Jumlah statement tidak bertambah dengan jumlah kelas atau kategori
+    assert queries.count <= create_event.query_budget
+
+
+def test_update_event_with_classes_and_categories_stays_within_its_budget(event_writes):
+    created, _ = event_writes("create_event", EventCreate(
+        name="Budget Fest",
+        description="Budget Fest description",
+        location="Jakarta",
+        categories=["Music", "Jazz"],
+        date=datetime.now() + timedelta(days=30),
+        event_classes=event_classes("Regular", "VIP"),
+        image=event_image(),
+    ), create_event.query_budget)
+    event = EventUpdate(
+        event_id=str(created.data.event_id),
+        name="Budget Fest 2",
+        description="Budget Fest description",
+        location="Jakarta",
+        categories=["Jazz", "Outdoor"],
+        date=datetime.now() + timedelta(days=31),
+        event_classes=event_classes("VIP", "VVIP", "Backstage"),
+    )
+
+    response, queries = event_writes("update_event", event, update_event.query_budget)
+
+    assert set(response.data.categories) == {"Jazz", "Outdoor"}
+    assert queries.count <= update_event.query_budget
@@ -0,0 +1,95 @@
+"""
+Query-plan regression tests for the hot repository queries.
+
+Every case runs the real repository method against the SQLite test database
+(created from the SQLModel metadata, including the indexes of migrations
+c4a8e2f19d07 and e7d2a94b1c38), captures the statements it issues and fails when EXPLAIN QUERY
+PLAN reads a table by a full scan instead of an index.
+"""
+import asyncio
+import contextlib
+from datetime import datetime
+from typing import List, Tuple
+from uuid import uuid4
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.models import ProviderName
+from app.repositories.event_organizer_repository import EventOrganizerRepository
+from app.repositories.event_repository import EventRepository
+from app.repositories.otp_repository import OTPRepository
+from app.repositories.payment_repository import PaymentRepository
+from app.repositories.provider_repository import ProviderRepository
+from app.repositories.user_repository import UserRepository
+from app.schemas.event import EventFilter
+from app.services.event_service import PUBLIC_EVENT_STATUSES
+
+USER_ID = uuid4()
+
+HOT_QUERIES = {
+    "scheduler_cancel_pending": lambda session: EventRepository(session).cancel_pending_events_before(datetime.now(), 100),
+    "events_by_status": lambda session: EventRepository(session).get_events_by_status(PUBLIC_EVENT_STATUSES),
+    "event_page": lambda session: EventRepository(session).get_event_page(PUBLIC_EVENT_STATUSES, EventFilter()),
+    "event_page_by_category": lambda session: EventRepository(session).get_event_page(
+        PUBLIC_EVENT_STATUSES, EventFilter(category="Music")
+    ),
+    "event_page_by_organizer": lambda session: EventRepository(session).get_event_page(
+        PUBLIC_EVENT_STATUSES, EventFilter(), organizer_id=uuid4()
+    ),
+    "event_search": lambda session: EventRepository(session).search_events("jazz", PUBLIC_EVENT_STATUSES, 21),
+    "event_detail": lambda session: EventRepository(session).get_event_detail_by_status(uuid4(), PUBLIC_EVENT_STATUSES),
+    "events_by_organizer": lambda session: EventRepository(session).get_events_by_organizer_id(uuid4()),
+    "event_class_by_name": lambda session: EventRepository(session).get_event_class_by_id_and_name(uuid4(), "VIP"),
+    "payments_by_user": lambda session: PaymentRepository(session).get_all_payments(USER_ID),
+    "organizer_by_user": lambda session: EventOrganizerRepository(session).get_organizer_by_user_id(USER_ID),
+    "otp_by_user": lambda session: OTPRepository(session).get_otp_by_user_id(USER_ID),
+    "provider_by_user": lambda session: ProviderRepository(session).get_by_provider_name_by_user_id(
+        USER_ID, ProviderName.EMAIL
+    ),
+    "face_index_poll": lambda session: UserRepository(session).get_embeddings_updated_since(datetime.now()),
+}
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    # "SCAN <table>" tanpa "USING ... INDEX" berarti tabel dibaca seluruhnya
+    return [detail for detail in plan if detail.startswith("SCAN ") and "INDEX" not in detail]
+
+
+def capture_statements(name: str) -> List[Tuple[str, tuple]]:
+    """
+    Run the hot query and return the (statement, parameters) it issued, rolled back afterwards.
+    """
+    statements = []
+
+    async def run():
+        engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, poolclass=NullPool)
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        try:
+            async with sessionmaker(bind=engine, class_=AsyncSession)() as session:
+                # Query yang tidak menemukan baris boleh gagal dengan 404, statement-nya tetap tercatat
+                with contextlib.suppress(HTTPException):
+                    await HOT_QUERIES[name](session)
+                await session.rollback()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+    return statements
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_indexes(sync_engine, name):
+    statements = capture_statements(name)
+    assert statements, f"{name} issued no SQL"
+    with sync_engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            assert not full_scans(plan), f"{name} scans a table: {'; '.join(plan)}\n{statement}"